@@ -0,0 +1,111 @@
+import asyncio
+
+from json_encoding import dumps as encode_alert
+
+
+def sse_event(alert_id, data):
+    """Evento Server-Sent Events a partir del JSON ya codificado de una alerta."""
+    return b"id: %d\nevent: alert\ndata: %s\n\n" % (alert_id, data)
+
+
+def encode_event(alert):
+    return sse_event(alert["id"], encode_alert(alert))
+
+
+class Subscription:
+    """Cola de un cliente conectado al stream de alertas.
+
+    Recibe lotes de pares ``(alerta, json)`` que ya pasaron su ``alert_filter``.
+    Cuando el cliente no consume y la cola se llena se aplica ``overflow``:
+
+    * ``"close"``: la suscripción se cierra; el cliente SSE vuelve a conectar
+      con ``Last-Event-ID`` y recupera lo perdido del almacén.
+    * ``"drop"``: se descarta el lote más antiguo y se cuenta en ``dropped``
+      para avisar al cliente, sin que la cola crezca.
+    """
+
+    def __init__(self, maxsize, alert_filter=None, overflow="close"):
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.alert_filter = alert_filter
+        self.overflow = overflow
+        self.dropped = 0
+        self.closed = False
+
+    def push(self, batch):
+        if self.closed:
+            return
+        if self.alert_filter is not None:
+            batch = [item for item in batch if self.alert_filter.matches(item[0])]
+            if not batch:
+                return
+        try:
+            self.queue.put_nowait(batch)
+        except asyncio.QueueFull:
+            if self.overflow == "drop":
+                self.dropped += len(self.queue.get_nowait())
+                self.queue.put_nowait(batch)
+            else:
+                self.close()
+
+    def take_dropped(self):
+        dropped, self.dropped = self.dropped, 0
+        return dropped
+
+    def close(self):
+        self.closed = True
+        # Desbloquea al consumidor aunque la cola esté llena
+        while True:
+            try:
+                self.queue.put_nowait(None)
+                break
+            except asyncio.QueueFull:
+                self.queue.get_nowait()
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class AlertBroadcaster:
+    """Reparte las alertas nuevas del lector a todos los suscriptores.
+
+    ``publish`` se llama desde el hilo del lector; el reparto se hace en el
+    event loop, y cada alerta se codifica una sola vez para todos los clientes
+    con ``encode`` (por defecto ``encode_alert``).
+    """
+
+    def __init__(self, queue_size=256, encode=encode_alert):
+        self.queue_size = queue_size
+        self.encode = encode
+        self._loop = None
+        self._subscribers = set()
+
+    def attach(self, loop):
+        self._loop = loop
+
+    def subscribe(self, alert_filter=None, overflow="close"):
+        subscription = Subscription(self.queue_size, alert_filter, overflow)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        self._subscribers.discard(subscription)
+
+    @property
+    def subscribers(self):
+        return len(self._subscribers)
+
+    def publish(self, alerts):
+        if self._loop is None or not alerts:
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._dispatch, alerts)
+        except RuntimeError:
+            # El event loop ya se cerró (apagado de la API)
+            pass
+
+    def _dispatch(self, alerts):
+        if not self._subscribers:
+            return
+        batch = [(alert, self.encode(alert)) for alert in alerts]
+        for subscription in list(self._subscribers):
+            subscription.push(batch)
@@ -0,0 +1,70 @@
+import threading
+from collections import OrderedDict
+
+from json_encoding import dumps
+
+
+class EncodedAlertCache:
+    """Caché LRU del JSON de cada alerta, indexada por id.
+
+    El lector guarda aquí los bytes de cada alerta al parsearla, así que una
+    respuesta de /api/alerts es la concatenación de fragmentos ya codificados.
+    La memoria se limita a ``max_bytes`` expulsando las menos usadas. Solo
+    ``add`` guarda entradas: ``encode`` codifica las que no están (filas
+    antiguas de una consulta al histórico) sin guardarlas, para que una
+    consulta grande no expulse las alertas recientes.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _store(self, alert_id, data):
+        old = self._entries.pop(alert_id, None)
+        if old is not None:
+            self.bytes -= len(old)
+        self._entries[alert_id] = data
+        self.bytes += len(data)
+        while self.bytes > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self.bytes -= len(evicted)
+            self.evictions += 1
+
+    def add(self, alerts):
+        """Codifica y guarda alertas recién ingeridas."""
+        encoded = [(alert["id"], dumps(alert)) for alert in alerts]
+        with self._lock:
+            for alert_id, data in encoded:
+                self._store(alert_id, data)
+
+    def encode(self, alert):
+        alert_id = alert.get("id")
+        if alert_id is None:
+            return dumps(alert)
+        with self._lock:
+            data = self._entries.get(alert_id)
+            if data is not None:
+                self._entries.move_to_end(alert_id)
+                self.hits += 1
+                return data
+            self.misses += 1
+        return dumps(alert)
+
+    def encode_list(self, alerts):
+        return b"[" + b",".join(map(self.encode, alerts)) + b"]"
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,73 @@
+from collections import OrderedDict
+
+from alert_parser import EpochCache
+
+
+class AlertCoalescer:
+    """Agrega ráfagas de alertas casi idénticas en un solo registro.
+
+    Las alertas con la misma clave ``(sid, ip_src, ip_dst, protocol)`` que
+    llegan a menos de ``window`` segundos de la anterior se suman al registro
+    abierto: ``count`` lleva la cuenta exacta y ``first_seen``/``last_seen``
+    el intervalo de la ráfaga. La primera alerta de una ráfaga se emite en
+    el momento; las siguientes solo actualizan ese registro.
+
+    Se guardan como mucho ``max_groups`` ráfagas abiertas, de modo que un
+    escaneo con millones de claves distintas no hace crecer la memoria. Con
+    ``max_lag`` una ráfaga se cierra cuando ya se crearon ese número de
+    registros después del suyo, para que un escaneo largo siga apareciendo
+    entre las alertas recientes en lugar de quedarse en un id antiguo.
+    """
+
+    def __init__(self, window, max_groups=100000, max_lag=None):
+        self.window = int(window * 1_000_000)
+        self.max_groups = max_groups
+        self.max_lag = max_lag
+        self._last_id = 0
+        # clave -> (registro, timestamp en µs de su última alerta), ordenado
+        # por última actualización
+        self._groups = OrderedDict()
+        self._epoch = EpochCache(10000)
+
+    def feed(self, alerts, next_id):
+        """Agrega un lote de alertas parseadas (sin id).
+
+        ``next_id()`` da el id de cada registro nuevo. Devuelve
+        ``(registros, absorbidas)``: la última versión de cada registro creado
+        o actualizado por el lote, en orden de id, y las alertas que se
+        sumaron a un registro en lugar de crear uno.
+        """
+        if not alerts:
+            return [], []
+        groups = self._groups
+        changed = {}
+        absorbed = []
+        newest = None
+        for alert in alerts:
+            ts = self._epoch(alert["timestamp"])
+            key = (alert.get("sid"), alert["ip_src"], alert["ip_dst"], alert["protocol"])
+            group = groups.get(key)
+            if (group is not None and 0 <= ts - group[1] <= self.window
+                    and (self.max_lag is None or self._last_id - group[0]["id"] < self.max_lag)):
+                record = group[0]
+                # Copia nueva: la versión anterior puede estar sirviéndose ya
+                record = dict(record, count=record["count"] + 1, last_seen=alert["timestamp"])
+                absorbed.append(alert)
+                groups.move_to_end(key)
+            else:
+                record = dict(alert, id=next_id(), count=1, first_seen=alert["timestamp"],
+                              last_seen=alert["timestamp"])
+                self._last_id = record["id"]
+                groups.pop(key, None)
+            groups[key] = (record, ts)
+            changed[record["id"]] = record
+            if newest is None or ts > newest:
+                newest = ts
+
+        # Cerrar las ráfagas que ya no pueden recibir más alertas
+        while groups:
+            key, (record, ts) = next(iter(groups.items()))
+            if len(groups) <= self.max_groups and ts >= newest - self.window:
+                break
+            del groups[key]
+        return sorted(changed.values(), key=lambda record: record["id"]), absorbed
@@ -0,0 +1,185 @@
+import zlib
+
+from alert_store import ALERT_FIELDS
+from ip_ranges import ip_key
+
+# brotli es opcional: sin él solo se ofrece gzip
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# pyarrow es opcional: sin él no hay exportación Arrow/Parquet
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+COLUMNAR_FORMATS = {"arrow", "parquet"}
+# Filas por record batch / row group en las exportaciones columnares
+COLUMNAR_BATCH_ROWS = 65536
+
+_V4_PREFIX = ip_key("0.0.0.0")[:12]
+
+
+def ndjson_chunks(store, **query):
+    for lines in store.iter_json(**query):
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def csv_chunks(store, **query):
+    yield (",".join(ALERT_FIELDS) + "\r\n").encode("utf-8")
+    for lines in store.iter_csv(**query):
+        yield ("\r\n".join(lines) + "\r\n").encode("utf-8")
+
+
+def choose_encoding(accept_encoding):
+    """Elige la compresión a partir de la cabecera Accept-Encoding."""
+    accepted = {part.split(";")[0].strip().lower() for part in (accept_encoding or "").split(",")}
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def compress_chunks(chunks, encoding):
+    """Comprime al vuelo sin acumular la exportación completa en memoria."""
+    if encoding is None:
+        yield from chunks
+        return
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=4)
+        compress, finish = compressor.process, compressor.finish
+    else:
+        # Nivel 1: prima el caudal sobre la tasa de compresión
+        compressor = zlib.compressobj(1, zlib.DEFLATED, 31)
+        compress, finish = compressor.compress, compressor.flush
+    for chunk in chunks:
+        data = compress(chunk)
+        if data:
+            yield data
+    yield finish()
+
+
+def arrow_schema():
+    """Esquema tipado de la exportación columnar.
+
+    ``ts`` son microsegundos desde epoch (int64), las IPs van como clave de
+    16 bytes (las IPv4 mapeadas en IPv6) y además como uint32 cuando son
+    IPv4; protocolo, clasificación y descripción van codificados como
+    diccionario.
+    """
+    text = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([
+        ("id", pa.int64()),
+        ("ts", pa.timestamp("us", tz="UTC")),
+        ("ip_src", pa.binary(16)),
+        ("ip_src_v4", pa.uint32()),
+        ("ip_dst", pa.binary(16)),
+        ("ip_dst_v4", pa.uint32()),
+        ("src_port", pa.uint16()),
+        ("dst_port", pa.uint16()),
+        ("protocol", text),
+        ("gid", pa.uint32()),
+        ("sid", pa.uint32()),
+        ("rev", pa.uint32()),
+        ("priority", pa.uint8()),
+        ("classification", text),
+        ("description", text),
+        ("count", pa.uint32()),
+    ])
+
+
+def _ipv4(keys):
+    return [int.from_bytes(key[12:], "big") if key is not None and key[:12] == _V4_PREFIX else None
+            for key in keys]
+
+
+def _record_batch(rows, schema):
+    (ids, ts, src_keys, dst_keys, src_ports, dst_ports, protocols, gids, sids, revs,
+     priorities, classifications, descriptions, counts) = zip(*rows)
+    columns = {
+        "id": ids,
+        "ts": ts,
+        "ip_src": src_keys,
+        "ip_src_v4": _ipv4(src_keys),
+        "ip_dst": dst_keys,
+        "ip_dst_v4": _ipv4(dst_keys),
+        "src_port": src_ports,
+        "dst_port": dst_ports,
+        "gid": gids,
+        "sid": sids,
+        "rev": revs,
+        "priority": priorities,
+        "count": counts,
+    }
+    arrays = []
+    for field in schema:
+        if pa.types.is_dictionary(field.type):
+            values = {"protocol": protocols, "classification": classifications,
+                      "description": descriptions}[field.name]
+            arrays.append(pa.array(values, pa.string()).dictionary_encode())
+        else:
+            arrays.append(pa.array(columns[field.name], field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class _ChunkSink:
+    """Archivo de solo escritura que acumula bytes hasta que se recogen."""
+
+    closed = False
+
+    def __init__(self):
+        self._chunks = []
+        self._size = 0
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._size += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._size
+
+    def flush(self):
+        pass
+
+    def writable(self):
+        return True
+
+    def close(self):
+        self.closed = True
+
+    def take(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def columnar_chunks(store, export_format, **query):
+    """Exporta en Arrow IPC (stream) o Parquet, un record batch por lote del almacén."""
+    schema = arrow_schema()
+    sink = _ChunkSink()
+    output = pa.PythonFile(sink, mode="w")
+    if export_format == "arrow":
+        writer = pa.ipc.new_stream(output, schema)
+        write = writer.write_batch
+    else:
+        writer = pq.ParquetWriter(output, schema)
+        write = lambda batch: writer.write_table(pa.Table.from_batches([batch]))  # noqa: E731
+    for rows in store.iter_raw(batch_size=COLUMNAR_BATCH_ROWS, **query):
+        write(_record_batch(rows, schema))
+        data = sink.take()
+        if data:
+            yield data
+    writer.close()
+    yield sink.take()
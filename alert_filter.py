@@ -0,0 +1,85 @@
+from ip_ranges import NetworkSet, ip_key
+
+
+def _as_list(value):
+    if value is None:
+        return None
+    if isinstance(value, (list, tuple, set)):
+        return list(value)
+    return [value]
+
+
+def _networks(value):
+    cidrs = _as_list(value)
+    return NetworkSet(str(cidr) for cidr in cidrs) if cidrs else None
+
+
+class AlertFilter:
+    """Filtro de suscripción evaluado en memoria sobre cada alerta nueva.
+
+    Se construye a partir del JSON que envía el cliente, por ejemplo::
+
+        {"cidr": ["10.0.4.0/24"], "sid": [2001219, 527], "protocol": "TCP", "priority": 1}
+
+    Claves admitidas: ``ip``, ``cidr`` (cualquiera de los dos extremos),
+    ``src_cidr``, ``dst_cidr``, ``sid``, ``protocol`` y ``priority``; cada una
+    acepta un valor o una lista. Todas las condiciones deben cumplirse.
+    """
+
+    FIELDS = {"ip", "cidr", "src_cidr", "dst_cidr", "sid", "protocol", "priority"}
+
+    def __init__(self, ips=None, cidr=None, src_cidr=None, dst_cidr=None,
+                 sids=None, protocols=None, priorities=None):
+        self.ips = ips
+        self.cidr = cidr
+        self.src_cidr = src_cidr
+        self.dst_cidr = dst_cidr
+        self.sids = sids
+        self.protocols = protocols
+        self.priorities = priorities
+
+    @classmethod
+    def from_spec(cls, spec):
+        """Crea el filtro; lanza ``ValueError`` si la especificación no es válida."""
+        if spec is None:
+            spec = {}
+        if not isinstance(spec, dict):
+            raise ValueError("el filtro debe ser un objeto JSON")
+        unknown = set(spec) - cls.FIELDS
+        if unknown:
+            raise ValueError(f"campos de filtro desconocidos: {', '.join(sorted(unknown))}")
+        try:
+            ips = _as_list(spec.get("ip"))
+            sids = _as_list(spec.get("sid"))
+            protocols = _as_list(spec.get("protocol"))
+            priorities = _as_list(spec.get("priority"))
+            return cls(
+                ips={str(ip) for ip in ips} if ips else None,
+                cidr=_networks(spec.get("cidr")),
+                src_cidr=_networks(spec.get("src_cidr")),
+                dst_cidr=_networks(spec.get("dst_cidr")),
+                sids={int(sid) for sid in sids} if sids else None,
+                protocols={str(p).upper() for p in protocols} if protocols else None,
+                priorities={int(p) for p in priorities} if priorities else None,
+            )
+        except TypeError as e:
+            raise ValueError(str(e))
+
+    def matches(self, alert):
+        if self.sids is not None and alert.get("sid") not in self.sids:
+            return False
+        if self.protocols is not None and alert.get("protocol") not in self.protocols:
+            return False
+        if self.priorities is not None and alert.get("priority") not in self.priorities:
+            return False
+        if self.ips is not None and alert["ip_src"] not in self.ips and alert["ip_dst"] not in self.ips:
+            return False
+        if self.src_cidr is not None or self.dst_cidr is not None or self.cidr is not None:
+            src, dst = ip_key(alert["ip_src"]), ip_key(alert["ip_dst"])
+            if self.src_cidr is not None and not self.src_cidr.contains_key(src):
+                return False
+            if self.dst_cidr is not None and not self.dst_cidr.contains_key(dst):
+                return False
+            if self.cidr is not None and not (self.cidr.contains_key(src) or self.cidr.contains_key(dst)):
+                return False
+        return True
@@ -0,0 +1,339 @@
+import operator
+import re
+import time
+from array import array
+from itertools import compress, starmap
+
+# Línea de alerta en formato "fast" de Snort, por ejemplo:
+# 04/16-21:33:29.123456  [**] [1:1000001:1] Ping detectado [**]
+#     [Classification: Misc activity] [Priority: 3] {TCP} 10.0.0.5:4431 -> 10.0.0.1:80
+_FAST_PATTERN = (
+    r"(?P<timestamp>\S+)[ \t]+\[\*\*\][ \t]+"
+    r"\[(?P<alert>(?P<gid>\d+):(?P<sid>\d+):(?P<rev>\d+))\][ \t]*"
+    r"(?P<description>.*?)[ \t]*\[\*\*\]"
+    r"(?:[ \t]*\[Classification:[ \t]*(?P<classification>[^\]\n]*?)[ \t]*\])?"
+    r"(?:[ \t]*\[Priority:[ \t]*(?P<priority>\d+)[ \t]*\])?"
+    r"[ \t]*\{(?P<protocol>[^}\n]*)\}[ \t]+(?P<src>\S+)[ \t]+->[ \t]+(?P<dst>\S+)"
+)
+_FAST_LINE = re.compile(_FAST_PATTERN)
+# Misma expresión anclada a cada línea para recorrer un buffer completo
+_FAST_LINES = re.compile(r"^[ \t]*" + _FAST_PATTERN + r"[ \t\r]*$", re.MULTILINE)
+
+# Extremo de la conexión: las IPv4 (el caso común) se separan del puerto
+# dentro de la propia expresión regular; el resto pasa por split_endpoint.
+_ENDPOINT = r"(?:(\d{1,3}(?:\.\d{1,3}){3})(?::(\d+))?|(\S+))"
+# Formato exacto que escribe Snort (un espacio entre campos, sin espacios de
+# más alrededor de los textos) para parse_line; las líneas que no encajan se
+# prueban con _FAST_LINE.
+_EXACT_LINE = re.compile(
+    r"(\S+) +\[\*\*\] \[((\d+):(\d+):(\d+))\] (?![ \t])"
+    r"([^[\n]*(?:\[(?!\*\*\])[^[\n]*)*)(?<![ \t]) \[\*\*\] "
+    r"(?:\[Classification: (?![ \t])([^\]\n]*)(?<![ \t])\] )?(?:\[Priority: (\d+)\] )?"
+    r"\{([^}\n]*)\} " + _ENDPOINT + " -> " + _ENDPOINT + r"\r?$"
+)
+
+_PORT_PROTOCOLS = {"TCP", "UDP"}
+
+
+def split_endpoint(text, protocol):
+    """Separa ``ip[:puerto]`` en ``(ip, puerto)``; el puerto puede ser ``None``."""
+    if ":" not in text:
+        return text, None
+    if text[0] == "[":
+        # IPv6 con corchetes: [2001:db8::1]:443
+        host, _, port = text[1:].partition("]")
+        port = port[1:]
+        return host, int(port) if port.isdigit() else None
+    host, _, port = text.rpartition(":")
+    # Snort 2 añade el puerto también a las IPv6 sin corchetes en TCP/UDP
+    if port.isdigit() and (":" not in host or protocol in _PORT_PROTOCOLS):
+        return host, int(port)
+    return text, None
+
+
+def parse_line(line):
+    """Convierte una línea de alert.ids en un diccionario con la forma de ``Alert``.
+
+    Una línea es una sola alerta: ``count`` es 1 y ``first_seen`` y
+    ``last_seen`` son su timestamp. Devuelve ``None`` si la línea no tiene
+    el formato fast de Snort.
+    """
+    match = _EXACT_LINE.match(line)
+    if match is not None:
+        (timestamp, alert, gid, sid, rev, description, classification, priority,
+         protocol, ip_src, src_port, src, ip_dst, dst_port, dst) = match.groups()
+        src_port = int(src_port) if src_port else None
+        dst_port = int(dst_port) if dst_port else None
+    else:
+        match = _FAST_LINE.match(line)
+        if match is None:
+            return None
+        (timestamp, alert, gid, sid, rev, description, classification,
+         priority, protocol, src, dst) = match.groups()
+        ip_src = ip_dst = None
+    if ip_src is None:
+        ip_src, src_port = split_endpoint(src, protocol)
+    if ip_dst is None:
+        ip_dst, dst_port = split_endpoint(dst, protocol)
+    return {
+        "timestamp": timestamp,
+        "ip_src": ip_src,
+        "ip_dst": ip_dst,
+        "protocol": protocol,
+        "alert": alert,
+        "description": description,
+        "gid": int(gid),
+        "sid": int(sid),
+        "rev": int(rev),
+        "classification": classification,
+        "priority": int(priority) if priority is not None else None,
+        "src_port": src_port,
+        "dst_port": dst_port,
+        "count": 1,
+        "first_seen": timestamp,
+        "last_seen": timestamp,
+    }
+
+
+def parse_timestamp(text, year=None):
+    """Convierte un timestamp de Snort a microsegundos desde epoch (hora local).
+
+    Acepta ``MM/DD-HH:MM:SS.ffffff`` y, con ``snort -y``,
+    ``MM/DD/YY-HH:MM:SS.ffffff``. Sin año en la línea se usa ``year`` o el
+    año actual.
+    """
+    date, _, clock = text.partition("-")
+    seconds, _, fraction = clock.partition(".")
+    parts = date.split("/")
+    if len(parts) == 3:
+        year = 2000 + int(parts[2])
+    elif year is None:
+        year = time.localtime().tm_year
+    hour, minute, second = seconds.split(":")
+    epoch = time.mktime((year, int(parts[0]), int(parts[1]),
+                         int(hour), int(minute), int(second), 0, 0, -1))
+    return int(epoch) * 1_000_000 + int(fraction.ljust(6, "0")[:6] or 0)
+
+
+class EpochCache:
+    """``parse_timestamp`` para un flujo de alertas, memorizando cada segundo.
+
+    Las alertas de un mismo segundo comparten la conversión de la parte
+    ``MM/DD-HH:MM:SS``; solo se suman los microsegundos. Se recuerdan como
+    mucho ``max_size`` segundos distintos.
+    """
+
+    def __init__(self, max_size=100000):
+        self.max_size = max_size
+        self._seconds = {}
+
+    def __call__(self, timestamp):
+        head, _, fraction = timestamp.partition(".")
+        base = self._seconds.get(head)
+        if base is None:
+            if len(self._seconds) > self.max_size:
+                self._seconds.clear()
+            base = self._seconds[head] = parse_timestamp(head)
+        return base + int(fraction.ljust(6, "0")[:6] or 0)
+
+
+def format_timestamp(epoch_us, with_year=False):
+    seconds, micros = divmod(epoch_us, 1_000_000)
+    fmt = "%m/%d/%y-%H:%M:%S" if with_year else "%m/%d-%H:%M:%S"
+    return f"{time.strftime(fmt, time.localtime(seconds))}.{micros:06d}"
+
+
+class _Dictionary(dict):
+    """Codifica valores repetidos (protocolos, descripciones) como enteros."""
+
+    def __init__(self):
+        super().__init__()
+        self.values = []
+
+    def __missing__(self, value):
+        code = self[value] = len(self.values)
+        self.values.append(value)
+        return code
+
+
+class _Cache(dict):
+    """Memoriza una conversión costosa para valores con poca cardinalidad."""
+
+    def __init__(self, convert):
+        super().__init__()
+        self.convert = convert
+
+    def __missing__(self, key):
+        value = self[key] = self.convert(key)
+        return value
+
+
+class AlertColumns:
+    """Resultado columnar de ``parse_buffer``.
+
+    Cada alerta ocupa una posición en los arrays; protocolos, descripciones y
+    clasificaciones se guardan codificados en diccionarios. ``timestamps``
+    son microsegundos desde epoch y ``timestamp_texts`` el texto original de
+    la línea, que es el que llevan las filas. Las filas con la forma de
+    ``Alert`` (las mismas que da ``parse_line``) se construyen solo al
+    iterar o con ``row(i)``.
+    """
+
+    def __init__(self):
+        self.timestamps = array("q")
+        self.timestamp_texts = []
+        self.ip_src = []
+        self.ip_dst = []
+        # Enteros de 64 bits: -1 marca un puerto o una prioridad ausentes
+        self.src_ports = array("q")
+        self.dst_ports = array("q")
+        self.protocol_ids = array("L")
+        self.gids = array("q")
+        self.sids = array("q")
+        self.revs = array("q")
+        self.description_ids = array("L")
+        self.classification_ids = array("L")
+        self.priorities = array("q")
+        self.protocols = _Dictionary()
+        self.descriptions = _Dictionary()
+        self.classifications = _Dictionary()
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def __iter__(self):
+        protocols = self.protocols.values
+        descriptions = self.descriptions.values
+        classifications = self.classifications.values
+        return starmap(_make_row, zip(
+            self.timestamp_texts, self.ip_src, self.ip_dst, map(protocols.__getitem__, self.protocol_ids),
+            self.gids, self.sids, self.revs, map(descriptions.__getitem__, self.description_ids),
+            map(classifications.__getitem__, self.classification_ids), self.priorities,
+            self.src_ports, self.dst_ports))
+
+    def row(self, i):
+        return _make_row(
+            self.timestamp_texts[i], self.ip_src[i], self.ip_dst[i],
+            self.protocols.values[self.protocol_ids[i]], self.gids[i], self.sids[i], self.revs[i],
+            self.descriptions.values[self.description_ids[i]],
+            self.classifications.values[self.classification_ids[i]], self.priorities[i],
+            self.src_ports[i], self.dst_ports[i])
+
+
+def _make_row(timestamp, ip_src, ip_dst, protocol, gid, sid, rev, description, classification,
+              priority, src_port, dst_port):
+    return {
+        "timestamp": timestamp,
+        "ip_src": ip_src,
+        "ip_dst": ip_dst,
+        "protocol": protocol,
+        "alert": f"{gid}:{sid}:{rev}",
+        "description": description,
+        "gid": gid,
+        "sid": sid,
+        "rev": rev,
+        "classification": classification or None,
+        "priority": priority if priority >= 0 else None,
+        "src_port": src_port if src_port >= 0 else None,
+        "dst_port": dst_port if dst_port >= 0 else None,
+        "count": 1,
+        "first_seen": timestamp,
+        "last_seen": timestamp,
+    }
+
+
+# Formato exacto que escribe Snort (un espacio entre campos, sin espacios de
+# más alrededor de los textos, como _EXACT_LINE): es la variante más rápida
+# y cubre prácticamente todas las líneas.
+_BUFFER_LINE = re.compile(
+    r"^((\d\d/\d\d(?:/\d\d)?-\d\d:\d\d:\d\d)(?:\.(\d+))?) +\[\*\*\] "
+    r"\[(\d+):(\d+):(\d+)\] (?![ \t])([^[\n]*(?:\[(?!\*\*\])[^[\n]*)*)(?<![ \t]) \[\*\*\] "
+    r"(?:\[Classification: (?![ \t])([^\]\n]*)(?<![ \t])\] )?(?:\[Priority: (\d+)\] )?"
+    r"\{([^}\n]*)\} " + _ENDPOINT + " -> " + _ENDPOINT + r"\r?$",
+    re.MULTILINE,
+)
+# Variante tolerante con los espacios para los trozos donde la anterior no
+# reconoce todas las líneas.
+_BUFFER_LINE_LOOSE = re.compile(
+    r"^[ \t]*((\d\d/\d\d(?:/\d\d)?-\d\d:\d\d:\d\d)(?:\.(\d+))?)[ \t]+\[\*\*\][ \t]*"
+    r"\[(\d+):(\d+):(\d+)\][ \t]*(.*?)[ \t]*\[\*\*\][ \t]*"
+    r"(?:\[Classification:[ \t]*([^\]\n]*?)[ \t]*\][ \t]*)?(?:\[Priority:[ \t]*(\d+)[ \t]*\][ \t]*)?"
+    r"\{([^}\n]*)\}[ \t]+" + _ENDPOINT + r"[ \t]+->[ \t]+" + _ENDPOINT + r"[ \t\r]*$",
+    re.MULTILINE,
+)
+# Tamaño de los trozos del buffer que se parsean de una vez
+BATCH_CHARS = 4 << 20
+
+
+def _port(text):
+    return int(text) if text else -1
+
+
+def _micros(fractions):
+    if set(map(len, fractions)) == {6}:
+        return map(int, fractions)
+    return (int(f.ljust(6, "0")[:6] or 0) for f in fractions)
+
+
+def parse_buffer(data, year=None):
+    """Parsea un buffer completo de alert.ids y devuelve un ``AlertColumns``.
+
+    El buffer se recorre por trozos con una expresión regular multilínea y
+    cada columna se rellena con operaciones sobre la columna entera
+    (``map`` y cachés por valor) en lugar de construir un dict por línea.
+    Las líneas que no tienen formato fast se ignoran.
+
+    No es más rápido que ``parse_line``: la expresión regular cuesta lo
+    mismo por línea y montar las columnas (y después las filas) se suma. Lo
+    que gana es memoria, unas cinco veces menos por alerta mientras no se
+    construyen las filas; sirve para retener muchas alertas, no para
+    convertirlas enseguida en dicts.
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    columns = AlertColumns()
+    seconds = _Cache(lambda head: parse_timestamp(head, year))
+    ints = _Cache(_port)
+    # Las IPs se repiten mucho: se comparte un único objeto por dirección
+    addresses = _Cache(str)
+
+    start = 0
+    while start < len(data):
+        end = data.find(b"\n", start + BATCH_CHARS)
+        end = len(data) if end < 0 else end + 1
+        chunk = data[start:end].decode("utf-8", errors="ignore")
+        start = end
+        rows = _BUFFER_LINE.findall(chunk)
+        lines = chunk.count("\n") + (not chunk.endswith("\n"))
+        if len(rows) < lines:
+            rows = _BUFFER_LINE_LOOSE.findall(chunk)
+        if not rows:
+            continue
+        (texts, heads, fractions, gids, sids, revs, descriptions, classifications,
+         priorities, protocols, src4, src_ports, src_other,
+         dst4, dst_ports, dst_other) = zip(*rows)
+        del rows
+
+        columns.timestamp_texts.extend(texts)
+        columns.timestamps.extend(map(operator.add, map(seconds.__getitem__, heads),
+                                      _micros(fractions)))
+        columns.gids.extend(map(ints.__getitem__, gids))
+        columns.sids.extend(map(ints.__getitem__, sids))
+        columns.revs.extend(map(ints.__getitem__, revs))
+        columns.priorities.extend(map(ints.__getitem__, priorities))
+        columns.protocol_ids.extend(map(columns.protocols.__getitem__, protocols))
+        columns.description_ids.extend(map(columns.descriptions.__getitem__, descriptions))
+        columns.classification_ids.extend(map(columns.classifications.__getitem__, classifications))
+
+        for ipv4, ports, other, ips, port_column in (
+                (src4, src_ports, src_other, columns.ip_src, columns.src_ports),
+                (dst4, dst_ports, dst_other, columns.ip_dst, columns.dst_ports)):
+            offset = len(ips)
+            # Solo uno de los dos grupos tiene valor en cada fila
+            ips.extend(map(addresses.__getitem__, map(operator.add, ipv4, other)))
+            port_column.extend(map(ints.__getitem__, ports))
+            for i in compress(range(len(other)), other):
+                ip, port = split_endpoint(other[i], protocols[i])
+                ips[offset + i] = addresses[ip]
+                port_column[offset + i] = port if port is not None else -1
+    return columns
@@ -0,0 +1,732 @@
+import sqlite3
+import threading
+from collections import Counter, defaultdict
+
+from alert_parser import EpochCache
+from ip_ranges import ip_key
+from json_encoding import dumps
+from sketches import HyperLogLog, SpaceSaving
+
+# Columnas que forman una alerta tal como la devuelve la API
+ALERT_FIELDS = (
+    "id", "timestamp", "ip_src", "ip_dst", "protocol", "alert", "description",
+    "gid", "sid", "rev", "classification", "priority", "src_port", "dst_port",
+    "count", "first_seen", "last_seen",
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS alerts (
+    id INTEGER PRIMARY KEY,
+    ts INTEGER NOT NULL,
+    timestamp TEXT NOT NULL,
+    ip_src TEXT NOT NULL,
+    ip_dst TEXT NOT NULL,
+    protocol TEXT NOT NULL,
+    alert TEXT NOT NULL,
+    description TEXT NOT NULL,
+    gid INTEGER,
+    sid INTEGER,
+    rev INTEGER,
+    classification TEXT,
+    priority INTEGER,
+    src_port INTEGER,
+    dst_port INTEGER,
+    src_key BLOB,
+    dst_key BLOB,
+    count INTEGER NOT NULL DEFAULT 1,
+    first_seen TEXT,
+    last_seen TEXT
+);
+CREATE TABLE IF NOT EXISTS alert_counts (
+    dim TEXT NOT NULL,
+    span INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    key NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (dim, span, bucket, key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS alert_rollups (
+    span INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    sid INTEGER NOT NULL,
+    protocol TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (span, bucket, sid, protocol, priority)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS alert_sketches (
+    sid INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (sid, kind, bucket)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS ingest_state (
+    path TEXT PRIMARY KEY,
+    inode INTEGER NOT NULL,
+    offset INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS backfill_state (
+    path TEXT PRIMARY KEY,
+    inode INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    end_offset INTEGER NOT NULL,
+    max_id INTEGER NOT NULL
+);
+"""
+
+# Campos por los que se mantienen contadores de alertas
+STATS_DIMENSIONS = ("ip_src", "ip_dst", "sid", "protocol", "classification")
+# Duración de los buckets de los contadores en microsegundos (hora y día),
+# de menor a mayor; el span 0 es el total de todo el histórico.
+COUNT_SPANS = (3600 * 1_000_000, 86400 * 1_000_000)
+# Duración de los buckets de los histogramas (segundo, minuto y hora) en
+# microsegundos, por SID, protocolo y prioridad (-1 si la alerta no la trae).
+# La fila con sid 0 y protocolo vacío de cada bucket es su total.
+ROLLUP_SPANS = (1_000_000, 60 * 1_000_000, 3600 * 1_000_000)
+# Microsegundos de histórico que se guardan de cada span de rollups (los que
+# no aparecen, siempre). Los de un segundo son casi toda la tabla; en rangos
+# más antiguos el histograma usa los de minuto y hora y cuenta lo que no
+# cubren sobre las alertas. Los caducados se borran al ingerir, cada
+# ROLLUP_PRUNE_EVERY microsegundos de alertas.
+ROLLUP_RETENTION = {1_000_000: 7 * 86400 * 1_000_000}
+ROLLUP_PRUNE_EVERY = 3600 * 1_000_000
+# Sketches por hora de los campos de alta cardinalidad: HyperLogLog para
+# contar valores distintos y Space-Saving para las claves más frecuentes, de
+# todas las alertas (sid 0) y de cada firma.
+SKETCH_SPAN = 3600 * 1_000_000
+SKETCH_DIMENSIONS = ("ip_src", "ip_dst")
+HEAVY_HITTERS = 64
+
+# Columnas añadidas después de la primera versión del esquema y cómo
+# rellenarlas en las filas existentes
+_MIGRATIONS = {
+    "src_key": ("ALTER TABLE alerts ADD COLUMN src_key BLOB", "UPDATE alerts SET src_key = ip_key(ip_src)"),
+    "dst_key": ("ALTER TABLE alerts ADD COLUMN dst_key BLOB", "UPDATE alerts SET dst_key = ip_key(ip_dst)"),
+    "count": ("ALTER TABLE alerts ADD COLUMN count INTEGER NOT NULL DEFAULT 1", None),
+    "first_seen": ("ALTER TABLE alerts ADD COLUMN first_seen TEXT", "UPDATE alerts SET first_seen = timestamp"),
+    "last_seen": ("ALTER TABLE alerts ADD COLUMN last_seen TEXT", "UPDATE alerts SET last_seen = timestamp"),
+}
+
+_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_alerts_ts ON alerts (ts);
+CREATE INDEX IF NOT EXISTS idx_alerts_ip_src ON alerts (ip_src);
+CREATE INDEX IF NOT EXISTS idx_alerts_ip_dst ON alerts (ip_dst);
+CREATE INDEX IF NOT EXISTS idx_alerts_protocol ON alerts (protocol);
+CREATE INDEX IF NOT EXISTS idx_alerts_sid ON alerts (sid);
+CREATE INDEX IF NOT EXISTS idx_alerts_priority ON alerts (priority);
+CREATE INDEX IF NOT EXISTS idx_alerts_description ON alerts (description COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_alerts_src_key ON alerts (src_key);
+CREATE INDEX IF NOT EXISTS idx_alerts_dst_key ON alerts (dst_key);
+CREATE INDEX IF NOT EXISTS idx_alert_rollups_sid ON alert_rollups (sid, span, bucket);
+"""
+# Con más intervalos que estos, un filtro CIDR se evalúa con búsqueda binaria
+# sobre las alertas del rango de ids en lugar de con el índice.
+CIDR_INDEX_RANGES = 32
+
+_COLUMNS = ", ".join(ALERT_FIELDS)
+# Objeto JSON de cada alerta construido por SQLite (mismo orden de campos)
+_JSON_OBJECT = "json_object(" + ", ".join(f"'{field}', {field}" for field in ALERT_FIELDS) + ")"
+# Línea CSV de cada alerta construida por SQLite: los textos van siempre
+# entre comillas y %w duplica las comillas que contengan.
+_TEXT_FIELDS = {"timestamp", "ip_src", "ip_dst", "protocol", "alert", "description", "classification",
+                "first_seen", "last_seen"}
+_CSV_LINE = "printf('{}', {})".format(
+    ",".join('"%w"' if field in _TEXT_FIELDS else "%s" for field in ALERT_FIELDS),
+    ", ".join(f"ifnull({field}, '')" for field in ALERT_FIELDS),
+)
+# Columnas con sus tipos nativos para las exportaciones columnares
+RAW_FIELDS = ("ts", "src_key", "dst_key", "src_port", "dst_port", "protocol", "gid", "sid",
+              "rev", "priority", "classification", "description", "count")
+_COUNT_UPSERT = ("INSERT INTO alert_counts (dim, span, bucket, key, count) VALUES (?, ?, ?, ?, ?) "
+                 "ON CONFLICT (dim, span, bucket, key) DO UPDATE SET count = count + excluded.count")
+_ROLLUP_UPSERT = ("INSERT INTO alert_rollups (span, bucket, sid, protocol, priority, count) "
+                  "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (span, bucket, sid, protocol, priority) "
+                  "DO UPDATE SET count = count + excluded.count")
+_SKETCH_UPSERT = "INSERT OR REPLACE INTO alert_sketches (bucket, sid, kind, data) VALUES (?, ?, ?, ?)"
+_UPDATE_BURST = "UPDATE alerts SET count = ?, last_seen = ? WHERE id = ?"
+_SAVE_STATE = ("INSERT INTO ingest_state (path, inode, offset) VALUES (?, ?, ?) "
+               "ON CONFLICT (path) DO UPDATE SET inode = excluded.inode, offset = excluded.offset")
+_INSERT = (f"INSERT INTO alerts (ts, src_key, dst_key, {_COLUMNS}) "
+           f"VALUES (?, ?, ?, {', '.join('?' * len(ALERT_FIELDS))})")
+
+
+def split_range(since, until, spans):
+    """Descompone ``[since, until]`` en buckets completos de ``spans`` y restos.
+
+    ``spans`` va de menor a mayor duración. El centro del rango se cubre con
+    los buckets más grandes posibles y los bordes con los siguientes más
+    pequeños; lo que no llega al bucket más pequeño queda como resto.
+    Devuelve ``([(span, primero, último)], [(desde, hasta)])``.
+    """
+    buckets, rest = [], []
+    pending = [(since, until, len(spans))]
+    while pending:
+        low, high, level = pending.pop()
+        if low > high:
+            continue
+        if level == 0:
+            rest.append((low, high))
+            continue
+        span = spans[level - 1]
+        first, last = -(-low // span), (high + 1) // span - 1
+        if first > last:
+            pending.append((low, high, level - 1))
+            continue
+        buckets.append((span, first, last))
+        pending.append((low, first * span - 1, level - 1))
+        pending.append(((last + 1) * span, high, level - 1))
+    return buckets, rest
+
+
+def _alert_values(alert):
+    # Las alertas que no pasan por la agregación de ráfagas son una sola línea
+    values = [alert.get(field) for field in ALERT_FIELDS]
+    values[-3:] = (alert.get("count") or 1, alert.get("first_seen") or alert["timestamp"],
+                   alert.get("last_seen") or alert["timestamp"])
+    return tuple(values)
+
+
+def _escape_like(text):
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _cidr_clause(column, networks, functions):
+    ranges = networks.ranges()
+    if not ranges:
+        return "0", []
+    if len(ranges) <= CIDR_INDEX_RANGES:
+        clause = " OR ".join(f"{column} BETWEEN ? AND ?" for _ in ranges)
+        return f"({clause})", [key for pair in ranges for key in pair]
+    name = f"in_{column}_networks"
+    functions[name] = networks.contains_key
+    return f"{name}({column})", []
+
+
+def filter_clauses(ip_src=None, ip_dst=None, ip=None, protocol=None, sid=None,
+                   priority=None, description=None, description_prefix=None,
+                   src_cidr=None, dst_cidr=None):
+    """Traduce los filtros de la API a condiciones SQL sobre columnas indexadas.
+
+    ``src_cidr`` y ``dst_cidr`` son ``NetworkSet``. Devuelve las condiciones,
+    sus parámetros y las funciones SQL que hay que registrar en la conexión.
+    """
+    where, params, functions = [], [], {}
+    if ip_src is not None:
+        where.append("ip_src = ?")
+        params.append(ip_src)
+    if ip_dst is not None:
+        where.append("ip_dst = ?")
+        params.append(ip_dst)
+    if ip is not None:
+        where.append("(ip_src = ? OR ip_dst = ?)")
+        params.extend((ip, ip))
+    if protocol is not None:
+        where.append("protocol = ?")
+        params.append(protocol.upper())
+    if sid is not None:
+        where.append("sid = ?")
+        params.append(sid)
+    if priority is not None:
+        where.append("priority = ?")
+        params.append(priority)
+    if description_prefix:
+        # Rango sobre el índice NOCASE en lugar de recorrer la tabla
+        where.append("description COLLATE NOCASE >= ? AND description COLLATE NOCASE < ?")
+        params.extend((description_prefix, description_prefix + "\U0010ffff"))
+    if description:
+        where.append("description LIKE ? ESCAPE '\\'")
+        params.append(f"%{_escape_like(description)}%")
+    for column, networks in (("src_key", src_cidr), ("dst_key", dst_cidr)):
+        if networks is not None:
+            clause, values = _cidr_clause(column, networks, functions)
+            where.append(clause)
+            params.extend(values)
+    return where, params, functions
+
+
+class AlertStore:
+    """Almacén local de alertas en SQLite (modo WAL) indexado por timestamp.
+
+    Solo el hilo del lector de alertas escribe; cada hilo que consulta usa su
+    propia conexión, de modo que las lecturas no bloquean la ingesta.
+    """
+
+    def __init__(self, path, key="alert.ids"):
+        self.path = path
+        self.key = key
+        self._local = threading.local()
+        # Todas las alertas de un mismo segundo comparten la conversión a epoch
+        self._epoch = EpochCache()
+        # Sketches de las últimas horas, que son las que recibe la ingesta
+        self._sketches = {}
+        self._sketch_bucket = None
+        with self._connection() as conn:
+            conn.executescript(_SCHEMA)
+            self._migrate(conn)
+            conn.executescript(_INDEXES)
+            # Primer bucket desde el que cada span con retención está completo
+            self._rollup_horizons = {
+                span: conn.execute("SELECT MIN(bucket) FROM alert_rollups WHERE span = ?", (span,)).fetchone()[0]
+                for span in ROLLUP_RETENTION}
+            try:
+                conn.execute("SELECT json_object('id', 1)")
+                self.has_json = True
+            except sqlite3.OperationalError:
+                # SQLite compilado sin JSON1
+                self.has_json = False
+
+    def _open(self, **kwargs):
+        conn = sqlite3.connect(self.path, **kwargs)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._open()
+        return conn
+
+    def _migrate(self, conn):
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(alerts)")}
+        conn.create_function("ip_key", 1, ip_key, deterministic=True)
+        for column, (alter, backfill) in _MIGRATIONS.items():
+            if column not in columns:
+                conn.execute(alter)
+                if backfill is not None:
+                    conn.execute(backfill)
+        counted = conn.execute("SELECT 1 FROM alert_counts LIMIT 1").fetchone()
+        if counted is None:
+            # Contadores de una base creada antes de que existieran
+            for dim in STATS_DIMENSIONS:
+                for span in COUNT_SPANS + (0,):
+                    conn.execute(
+                        f"INSERT INTO alert_counts (dim, span, bucket, key, count) "
+                        f"SELECT ?, ?, {f'ts / {span}' if span else '0'}, ifnull({dim}, ''), SUM(count) "
+                        f"FROM alerts GROUP BY 3, 4", (dim, span))
+        rolled = conn.execute("SELECT 1 FROM alert_rollups LIMIT 1").fetchone()
+        if rolled is None:
+            for span in ROLLUP_SPANS:
+                conn.execute(
+                    f"INSERT INTO alert_rollups (span, bucket, sid, protocol, priority, count) "
+                    f"SELECT ?, ts / {span}, ifnull(sid, -1), protocol, ifnull(priority, -1), SUM(count) "
+                    f"FROM alerts GROUP BY 2, 3, 4, 5", (span,))
+                conn.execute(
+                    f"INSERT INTO alert_rollups (span, bucket, sid, protocol, priority, count) "
+                    f"SELECT ?, ts / {span}, 0, '', 0, SUM(count) FROM alerts GROUP BY 2", (span,))
+        sketched = conn.execute("SELECT 1 FROM alert_sketches LIMIT 1").fetchone()
+        if sketched is None:
+            cursor = conn.execute("SELECT ts, sid, ip_src, ip_dst, count FROM alerts ORDER BY id")
+            while True:
+                entries = cursor.fetchmany(50000)
+                if not entries:
+                    break
+                conn.executemany(_SKETCH_UPSERT, self._update_sketches(conn, entries))
+
+    def _sketch(self, conn, bucket, sid, kind):
+        key = (bucket, sid, kind)
+        sketch = self._sketches.get(key)
+        if sketch is None:
+            cls = HyperLogLog if kind.startswith("hll_") else SpaceSaving
+            row = conn.execute("SELECT data FROM alert_sketches WHERE sid = ? AND kind = ? AND bucket = ?",
+                               (sid, kind, bucket)).fetchone()
+            if row is not None:
+                sketch = cls.from_bytes(row[0])
+            else:
+                sketch = HyperLogLog() if cls is HyperLogLog else SpaceSaving(HEAVY_HITTERS)
+            self._sketches[key] = sketch
+        return sketch
+
+    def _update_sketches(self, conn, entries):
+        """Actualiza los sketches con tuplas ``(ts, sid, ip_src, ip_dst, alertas)``.
+
+        Devuelve las filas de ``alert_sketches`` que hay que reescribir.
+        """
+        if not entries:
+            return []
+        groups = defaultdict(lambda: (Counter(), Counter()))
+        for ts, sid, ip_src, ip_dst, weight in entries:
+            bucket = ts // SKETCH_SPAN
+            for scope in (0, -1 if sid is None else sid):
+                sources, destinations = groups[bucket, scope]
+                sources[ip_src] += weight
+                destinations[ip_dst] += weight
+        rows = []
+        for (bucket, sid), columns in groups.items():
+            for dim, counts in zip(SKETCH_DIMENSIONS, columns):
+                distinct = self._sketch(conn, bucket, sid, "hll_" + dim)
+                distinct.update(counts.keys())
+                heavy = self._sketch(conn, bucket, sid, "top_" + dim)
+                heavy.update(counts)
+                rows.append((bucket, sid, "hll_" + dim, distinct.to_bytes()))
+                rows.append((bucket, sid, "top_" + dim, heavy.to_bytes()))
+        newest = max(bucket for bucket, _ in groups)
+        oldest = min(bucket for bucket, _ in groups)
+        if self._sketch_bucket is None or newest > self._sketch_bucket:
+            self._sketch_bucket = newest
+        elif oldest >= self._sketch_bucket - 1:
+            return rows
+        # La ingesta en vivo avanza en el tiempo: basta con la hora actual y la
+        # anterior. Las horas del histórico que se importa aparte se vuelven a
+        # leer de la base si hacen falta.
+        self._sketches = {key: sketch for key, sketch in self._sketches.items()
+                          if key[0] >= self._sketch_bucket - 1}
+        return rows
+
+    def add(self, alerts, inode, offset, updates=(), absorbed=()):
+        """Guarda ``alerts``, sus contadores y la posición del archivo en una sola transacción.
+
+        Con la agregación de ráfagas, ``updates`` son alertas ya guardadas
+        cuyo ``count`` y ``last_seen`` cambiaron y ``absorbed`` las líneas que
+        se sumaron a ellas: cuentan en contadores, rollups y sketches con su
+        propio timestamp, así que las estadísticas siguen siendo exactas.
+        """
+        self._write(alerts, updates, absorbed, [(_SAVE_STATE, (self.key, inode, offset))])
+
+    def add_backfill(self, alerts, offset, updates=(), absorbed=()):
+        """Como ``add``, para el histórico anterior al arranque (ver ``start_backfill``).
+
+        Guarda ``offset`` como avance del histórico y lo da por terminado al
+        llegar al final.
+        """
+        self._write(alerts, updates, absorbed, [
+            ("UPDATE backfill_state SET offset = ? WHERE path = ?", (offset, self.key)),
+            ("DELETE FROM backfill_state WHERE path = ? AND offset >= end_offset", (self.key,)),
+        ])
+
+    def _write(self, alerts, updates, absorbed, state):
+        rows = [(self._epoch(alert["timestamp"]), ip_key(alert["ip_src"]), ip_key(alert["ip_dst"]))
+                + _alert_values(alert)
+                for alert in alerts]
+        # Cada línea cuenta una vez: las alertas nuevas y las absorbidas
+        counted = [(row[0], alert) for row, alert in zip(rows, alerts)]
+        counted += [(self._epoch(alert["timestamp"]), alert) for alert in absorbed]
+        # Un lote suele caer en una o dos horas: se agrega antes de escribir
+        counts = Counter()
+        for dim in STATS_DIMENSIONS:
+            values = [("" if alert.get(dim) is None else alert.get(dim), ts) for ts, alert in counted]
+            for span in COUNT_SPANS:
+                counts.update((dim, span, ts // span, value) for value, ts in values)
+            counts.update((dim, 0, 0, value) for value, _ in values)
+        prune = self._advance_rollup_horizons(max((ts for ts, _ in counted), default=None))
+        horizons = {span: horizon for span, horizon in self._rollup_horizons.items() if horizon is not None}
+        rollups = Counter()
+        for ts, alert in counted:
+            sid, priority = alert.get("sid"), alert.get("priority")
+            key = (-1 if sid is None else sid, alert["protocol"], -1 if priority is None else priority)
+            for span in ROLLUP_SPANS:
+                bucket = ts // span
+                if span in horizons and bucket < horizons[span]:
+                    continue
+                rollups[(span, bucket) + key] += 1
+                rollups[span, bucket, 0, "", 0] += 1
+        conn = self._connection()
+        try:
+            with conn:
+                conn.executemany(_INSERT, rows)
+                conn.executemany(_UPDATE_BURST, [(alert["count"], alert["last_seen"], alert["id"])
+                                                 for alert in updates])
+                conn.executemany(_COUNT_UPSERT, [key + (count,) for key, count in counts.items()])
+                conn.executemany(_ROLLUP_UPSERT, [key + (count,) for key, count in rollups.items()])
+                sketches = self._update_sketches(
+                    conn, [(ts, alert.get("sid"), alert["ip_src"], alert["ip_dst"], 1) for ts, alert in counted])
+                conn.executemany(_SKETCH_UPSERT, sketches)
+                for sql, params in prune + state:
+                    conn.execute(sql, params)
+        except Exception:
+            # Los sketches en memoria ya incluyen el lote que no se guardó
+            self._sketches.clear()
+            raise
+
+    def _advance_rollup_horizons(self, newest):
+        # Sube el horizonte de los spans con retención antes de borrar sus
+        # buckets caducados, para que histogram no lea buckets ya borrados.
+        # Devuelve las sentencias que los borran.
+        prune = []
+        if newest is None:
+            return prune
+        for span, retention in ROLLUP_RETENTION.items():
+            cutoff = (newest - retention) // span
+            horizon = self._rollup_horizons[span]
+            if horizon is None or cutoff >= horizon + ROLLUP_PRUNE_EVERY // span:
+                self._rollup_horizons[span] = cutoff
+                prune.append(("DELETE FROM alert_rollups WHERE span = ? AND bucket < ?", (span, cutoff)))
+        return prune
+
+    def load_state(self):
+        row = self._connection().execute(
+            "SELECT inode, offset FROM ingest_state WHERE path = ?", (self.key,)).fetchone()
+        return tuple(row) if row is not None else None
+
+    def start_backfill(self, inode, end, max_id):
+        """Registra que hay que importar el archivo hasta ``end`` con ids hasta ``max_id``."""
+        with self._connection() as conn:
+            conn.execute("INSERT OR REPLACE INTO backfill_state (path, inode, offset, end_offset, max_id) "
+                         "VALUES (?, ?, 0, ?, ?)", (self.key, inode, end, max_id))
+
+    def load_backfill(self):
+        """``(inodo, offset, fin, id máximo)`` del histórico pendiente o ``None``."""
+        row = self._connection().execute(
+            "SELECT inode, offset, end_offset, max_id FROM backfill_state WHERE path = ?",
+            (self.key,)).fetchone()
+        return tuple(row) if row is not None else None
+
+    def clear_backfill(self):
+        with self._connection() as conn:
+            conn.execute("DELETE FROM backfill_state WHERE path = ?", (self.key,))
+
+    def last_id(self, limit=None):
+        """El mayor id guardado (que no pase de ``limit``), o 0."""
+        if limit is None:
+            row = self._connection().execute("SELECT MAX(id) FROM alerts").fetchone()
+        else:
+            row = self._connection().execute("SELECT MAX(id) FROM alerts WHERE id <= ?", (limit,)).fetchone()
+        return row[0] or 0
+
+    def recent(self, limit):
+        return self.query(limit=limit)
+
+    def after(self, last_id, limit=1000):
+        """Las ``limit`` alertas siguientes a ``last_id``, en orden cronológico."""
+        rows = self._connection().execute(
+            f"SELECT {_COLUMNS} FROM alerts WHERE id > ? ORDER BY id LIMIT ?", (last_id, limit)).fetchall()
+        return [dict(zip(ALERT_FIELDS, row)) for row in rows]
+
+    def _id_bounds(self, since, until):
+        # Las alertas se añaden en orden temporal, así que un rango de tiempo
+        # equivale a un rango de ids: basta con dos búsquedas en el índice.
+        conn = self._connection()
+        low = high = None
+        if since is not None:
+            row = conn.execute(
+                "SELECT id FROM alerts WHERE ts >= ? ORDER BY ts, id LIMIT 1", (since,)).fetchone()
+            low = row[0] if row is not None else self.last_id() + 1
+        if until is not None:
+            row = conn.execute(
+                "SELECT id FROM alerts WHERE ts <= ? ORDER BY ts DESC, id DESC LIMIT 1", (until,)).fetchone()
+            high = row[0] if row is not None else 0
+        return low, high
+
+    def _ts_bounds(self):
+        row = self._connection().execute(
+            "SELECT (SELECT ts FROM alerts ORDER BY id LIMIT 1), "
+            "(SELECT ts FROM alerts ORDER BY id DESC LIMIT 1)").fetchone()
+        return row if row[0] is not None else None
+
+    def stats(self, group_by, since=None, until=None, limit=10):
+        """Las ``limit`` claves de ``group_by`` con más alertas entre ``since`` y ``until``.
+
+        El rango se descompone en días completos, horas completas en sus
+        bordes y, solo para los extremos que no llegan a una hora, un conteo
+        sobre las alertas por rango de ids; sin rango se usa el total
+        acumulado. El coste depende de las claves distintas, no del número de
+        alertas. Devuelve ``(total, claves distintas, [(clave, n)])``.
+        """
+        if group_by not in STATS_DIMENSIONS:
+            raise ValueError(f"campo de agrupación no soportado: {group_by}")
+        conn = self._connection()
+        parts, params = [], []
+        if since is None and until is None:
+            # Los totales ya son únicos por clave: no hace falta reagrupar
+            rows = conn.execute(
+                "SELECT key, count, SUM(count) OVER (), COUNT(*) OVER () FROM alert_counts "
+                "WHERE dim = ? AND span = 0 ORDER BY count DESC, key LIMIT ?", (group_by, limit)).fetchall()
+        else:
+            bounds = self._ts_bounds()
+            if bounds is None:
+                return 0, 0, []
+            since = bounds[0] if since is None else max(since, bounds[0])
+            until = bounds[1] if until is None else min(until, bounds[1])
+            buckets, rest = split_range(since, until, COUNT_SPANS)
+            for span, first, last in buckets:
+                parts.append("SELECT key, SUM(count) AS count FROM alert_counts "
+                             "WHERE dim = ? AND span = ? AND bucket BETWEEN ? AND ? GROUP BY key")
+                params.extend((group_by, span, first, last))
+            for low_ts, high_ts in rest:
+                low, high = self._id_bounds(low_ts, high_ts)
+                if low <= high:
+                    parts.append(f"SELECT ifnull({group_by}, '') AS key, SUM(alerts.count) AS count "
+                                 f"FROM alerts WHERE id BETWEEN ? AND ? GROUP BY 1")
+                    params.extend((low, high))
+            if not parts:
+                return 0, 0, []
+            sql = (f"SELECT key, SUM(count) AS total, SUM(SUM(count)) OVER (), COUNT(*) OVER () "
+                   f"FROM ({' UNION ALL '.join(parts)}) GROUP BY key ORDER BY total DESC, key LIMIT ?")
+            rows = conn.execute(sql, params + [limit]).fetchall()
+        if not rows:
+            return 0, 0, []
+        return rows[0][2], rows[0][3], [(key if key != "" else None, count) for key, count, _, _ in rows]
+
+    def sketch_stats(self, dim, since=None, until=None, sid=None, limit=10):
+        """Valores distintos y claves más frecuentes aproximados de ``dim``.
+
+        Combina los sketches por hora de todas las alertas o de la firma
+        ``sid``; el rango se amplía a horas completas. Devuelve un dict con
+        ``total`` (exacto), ``distinct`` y su error estándar relativo
+        ``distinct_error``, y ``top`` como ``[(clave, cuenta, error)]``: la
+        frecuencia real está entre ``cuenta - error`` y ``cuenta``, y toda
+        clave con más de ``error_bound`` alertas aparece en el resultado.
+        """
+        if dim not in SKETCH_DIMENSIONS:
+            raise ValueError(f"campo sin sketches: {dim}")
+        sql = "SELECT kind, data FROM alert_sketches WHERE sid = ? AND kind IN (?, ?)"
+        params = [0 if sid is None else sid, "hll_" + dim, "top_" + dim]
+        if since is not None:
+            sql += " AND bucket >= ?"
+            params.append(since // SKETCH_SPAN)
+        if until is not None:
+            sql += " AND bucket <= ?"
+            params.append(until // SKETCH_SPAN)
+        distinct, heavy = HyperLogLog(), SpaceSaving(HEAVY_HITTERS)
+        counters = []
+        for kind, data in self._connection().execute(sql, params):
+            if kind.startswith("hll_"):
+                counters.append(HyperLogLog.from_bytes(data))
+            else:
+                heavy.merge(SpaceSaving.from_bytes(data))
+        if counters:
+            distinct.merge(*counters)
+        return {
+            "total": heavy.total,
+            "distinct": distinct.count(),
+            "distinct_error": distinct.relative_error,
+            "error_bound": heavy.total // HEAVY_HITTERS,
+            "top": heavy.top(limit),
+        }
+
+    def histogram(self, interval, since, until, sid=None, protocol=None, priority=None):
+        """Número de alertas por intervalo de ``interval`` microsegundos.
+
+        ``interval`` debe ser múltiplo de un segundo. Se suman los rollups más
+        grandes que caben en el rango y dividen al intervalo; solo los bordes
+        de menos de un segundo se cuentan sobre las alertas (una ráfaga
+        agregada cuenta ahí entera en su ``first_seen``), igual que los
+        buckets más antiguos que ``ROLLUP_RETENTION``. Devuelve
+        ``{inicio del intervalo: n}`` (sin los intervalos vacíos).
+        """
+        horizons = dict(self._rollup_horizons)
+        where, params = [], []
+        for column, value in (("sid", sid), ("protocol", protocol), ("priority", priority)):
+            if value is not None:
+                where.append(f"{column} = ?")
+                params.append(value.upper() if column == "protocol" else value)
+        # Sin filtros basta con la fila de total de cada bucket
+        totals = "sid = 0 AND protocol = ''" if not where else "protocol != ''"
+        # Sin estadísticas del planificador SQLite prefiere la clave primaria
+        index = " INDEXED BY idx_alert_rollups_sid" if sid is not None else ""
+        spans = tuple(span for span in ROLLUP_SPANS if interval % span == 0)
+        buckets, rest = split_range(since, until, spans)
+        parts, values = [], []
+        for span, first, last in buckets:
+            horizon = horizons.get(span)
+            if horizon is not None and first < horizon:
+                # Buckets caducados: se cuentan sobre las alertas
+                rest.append((first * span, min(last + 1, horizon) * span - 1))
+                first = horizon
+                if first > last:
+                    continue
+            parts.append(f"SELECT bucket * {span} / {interval} AS slot, SUM(count) AS count "
+                         f"FROM alert_rollups{index} WHERE span = ? AND bucket BETWEEN ? AND ? AND {totals}"
+                         f"{''.join(' AND ' + clause for clause in where)} GROUP BY 1")
+            values.extend([span, first, last] + params)
+        for low_ts, high_ts in rest:
+            low, high = self._id_bounds(low_ts, high_ts)
+            if low <= high:
+                parts.append(f"SELECT ts / {interval} AS slot, SUM(alerts.count) AS count FROM alerts "
+                             f"WHERE id BETWEEN ? AND ?{''.join(' AND ' + clause for clause in where)} "
+                             f"GROUP BY 1")
+                values.extend([low, high] + params)
+        if not parts:
+            return {}
+        sql = f"SELECT slot, SUM(count) FROM ({' UNION ALL '.join(parts)}) GROUP BY slot"
+        rows = self._connection().execute(sql, values).fetchall()
+        if horizons != self._rollup_horizons:
+            # La ingesta borró rollups durante la consulta: repetirla
+            return self.histogram(interval, since, until, sid, protocol, priority)
+        return {slot * interval: count for slot, count in rows}
+
+    def _select(self, columns, since, until, batch_size, filters):
+        """Recorre el rango en orden de id, ``batch_size`` filas por consulta.
+
+        Usa una conexión propia que se cierra al terminar: entre lotes el
+        generador puede reanudarse en otro hilo, y las funciones SQL de sus
+        filtros no se mezclan con las de otras consultas.
+        """
+        low, high = self._id_bounds(since, until)
+        where, params, functions = filter_clauses(**filters)
+        if high is not None:
+            where.append("id <= ?")
+            params.append(high)
+        where.append("id > ?")
+        sql = f"SELECT id, {columns} FROM alerts WHERE {' AND '.join(where)} ORDER BY id LIMIT ?"
+        # Solo la usa este generador, que nunca corre en dos hilos a la vez
+        conn = self._open(check_same_thread=False)
+        try:
+            for name, func in functions.items():
+                conn.create_function(name, 1, func, deterministic=True)
+            last = (low or 1) - 1
+            while True:
+                rows = conn.execute(sql, params + [last, batch_size]).fetchall()
+                if not rows:
+                    return
+                last = rows[-1][0]
+                yield rows
+                if len(rows) < batch_size:
+                    return
+        finally:
+            conn.close()
+
+    def iter_rows(self, since=None, until=None, batch_size=5000, **filters):
+        """Lotes de tuplas con los campos de ``ALERT_FIELDS`` para exportar."""
+        for rows in self._select(_COLUMNS, since, until, batch_size, filters):
+            yield [row[1:] for row in rows]
+
+    def iter_raw(self, since=None, until=None, batch_size=65536, **filters):
+        """Lotes de tuplas ``(id, *RAW_FIELDS)`` para exportaciones tipadas."""
+        yield from self._select(", ".join(RAW_FIELDS), since, until, batch_size, filters)
+
+    def iter_csv(self, since=None, until=None, batch_size=5000, **filters):
+        """Lotes de alertas como líneas CSV (``str``, sin salto de línea)."""
+        for rows in self._select(_CSV_LINE, since, until, batch_size, filters):
+            yield [row[1] for row in rows]
+
+    def iter_json(self, since=None, until=None, batch_size=5000, **filters):
+        """Lotes de alertas ya codificadas como JSON (``str``) por SQLite."""
+        if not self.has_json:
+            for rows in self.iter_rows(since, until, batch_size, **filters):
+                yield [dumps(dict(zip(ALERT_FIELDS, row))).decode("utf-8") for row in rows]
+            return
+        for rows in self._select(_JSON_OBJECT, since, until, batch_size, filters):
+            yield [row[1] for row in rows]
+
+    def query(self, since=None, until=None, limit=3000, before=None, **filters):
+        """Devuelve las últimas ``limit`` alertas entre ``since`` y ``until``.
+
+        ``since`` y ``until`` son microsegundos desde epoch (ambos incluidos).
+        ``before`` es el cursor de paginación: solo se devuelven alertas con id
+        menor, así que cualquier página cuesta lo mismo que la primera. Los
+        ``filters`` admitidos son los de ``filter_clauses``. El resultado va en
+        orden cronológico.
+        """
+        low, high = self._id_bounds(since, until)
+        if before is not None:
+            high = before - 1 if high is None else min(high, before - 1)
+        where, params, functions = filter_clauses(**filters)
+        if low is not None:
+            where.append("id >= ?")
+            params.append(low)
+        if high is not None:
+            where.append("id <= ?")
+            params.append(high)
+        sql = f"SELECT {_COLUMNS} FROM alerts"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+        conn = self._connection()
+        for name, func in functions.items():
+            conn.create_function(name, 1, func, deterministic=True)
+        rows = conn.execute(sql, params).fetchall()
+        rows.reverse()
+        return [dict(zip(ALERT_FIELDS, row)) for row in rows]
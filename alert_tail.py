@@ -0,0 +1,304 @@
+import os
+import threading
+from collections import deque
+
+from alert_coalesce import AlertCoalescer
+
+# Tamaño de bloque para leer los bytes nuevos del archivo de alertas
+READ_CHUNK = 1 << 20
+# Tamaño de bloque para leer el archivo hacia atrás desde el final
+TAIL_BLOCK = 64 * 1024
+
+
+def tail_offset(file, n, block_size=TAIL_BLOCK):
+    """Devuelve el offset donde empiezan las últimas ``n`` líneas de ``file``.
+
+    Lee bloques de tamaño fijo desde el final del archivo hacia atrás hasta
+    encontrar ``n`` saltos de línea, así que el coste depende de ``n`` y no
+    del tamaño del archivo.
+    """
+    file.seek(0, os.SEEK_END)
+    end = pos = file.tell()
+    if n <= 0:
+        return end
+    newlines = 0
+    while pos > 0:
+        read_size = min(block_size, pos)
+        pos -= read_size
+        file.seek(pos)
+        block = file.read(read_size)
+        stop = len(block)
+        if pos + read_size == end and block.endswith(b"\n"):
+            # El salto de línea final no abre una línea nueva
+            stop -= 1
+        while True:
+            stop = block.rfind(b"\n", 0, stop)
+            if stop < 0:
+                break
+            newlines += 1
+            if newlines == n:
+                return pos + stop + 1
+    return 0
+
+
+def read_last_bytes(path, n, block_size=TAIL_BLOCK):
+    with open(path, "rb") as file:
+        file.seek(tail_offset(file, n, block_size))
+        return file.read()
+
+
+def read_last_lines(path, n, block_size=TAIL_BLOCK):
+    data = read_last_bytes(path, n, block_size)
+    return data.decode("utf-8", errors="ignore").splitlines()
+
+
+class AlertTailer:
+    """Sigue el archivo de alertas de Snort en segundo plano.
+
+    Recuerda el offset y el inodo del archivo, de modo que en cada ciclo solo
+    parsea los bytes añadidos desde la última lectura. Si el inodo cambia o el
+    archivo se trunca (rotación de logs) vuelve a empezar desde el principio.
+    Las alertas parseadas reciben un id secuencial y se guardan en un anillo
+    en memoria del que se sirve directamente la API y, si se indica
+    ``store``, también en el almacén persistente junto con la posición del
+    archivo para poder continuar tras un reinicio. ``on_alerts`` recibe cada
+    lote de alertas nuevas una vez guardado.
+
+    Con ``coalesce_window`` (segundos) las ráfagas de alertas iguales se
+    agregan con ``AlertCoalescer``; ``on_alerts`` recibe entonces también los
+    registros cuyo ``count`` cambió, con el mismo id.
+
+    Si el almacén no tiene posición guardada para el archivo, el anillo se
+    llena con sus últimas ``maxlen`` líneas como sin almacén y lo anterior se
+    importa aparte (``backfill``), un bloque entre lectura y lectura de lo
+    nuevo y sin pasar por el anillo ni por ``on_alerts``. Esas alertas usan
+    ids reservados por debajo de los de la ingesta en vivo, así que el orden
+    de ids sigue siendo el del archivo.
+    """
+
+    def __init__(self, path, parse, maxlen=3000, poll_interval=1.0, store=None, on_alerts=None,
+                 coalesce_window=None):
+        self.path = path
+        self.parse = parse
+        self.maxlen = maxlen
+        self.poll_interval = poll_interval
+        self.store = store
+        self.on_alerts = on_alerts
+        # Una ráfaga se cierra antes de quedar fuera de la mitad reciente del anillo
+        self.coalesce_window = coalesce_window
+        self.coalescer = (AlertCoalescer(coalesce_window, max_lag=max(1, maxlen // 2))
+                          if coalesce_window else None)
+        self.offset = 0
+        self.inode = None
+        self.last_id = 0
+        # Cambia solo cuando cambia el contenido del anillo o del almacén
+        self.version = 0
+        # (inodo, offset, fin) del histórico pendiente de importar
+        self._backfill = None
+        self._backfill_id = 0
+        self._backfill_coalescer = None
+        self._alerts = deque(maxlen=maxlen)
+        self._partial = b""
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="alert-tailer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    @property
+    def ready(self):
+        return self.inode is not None
+
+    def position(self):
+        """``(inodo, offset, versión)`` del flujo de alertas, sin leer el archivo."""
+        with self._lock:
+            return self.inode, self.offset, self.version
+
+    def recent(self, limit=None):
+        with self._lock:
+            alerts = list(self._alerts)
+        if limit is not None:
+            alerts = alerts[-limit:] if limit > 0 else []
+        return alerts
+
+    def _run(self):
+        while True:
+            pending = False
+            try:
+                self.poll()
+                pending = self.backfill()
+            except Exception as e:
+                print(f"Error al leer el archivo de alertas: {e}")
+            # Mientras quede histórico se sigue sin esperar
+            if self._stop.wait(0 if pending else self.poll_interval):
+                break
+
+    def poll(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return 0
+
+        if self.inode is None:
+            self._resume(stat)
+        elif stat.st_ino != self.inode or stat.st_size < self.offset:
+            # El archivo fue rotado o truncado
+            self.offset = 0
+            self._partial = b""
+        self.inode = stat.st_ino
+
+        if stat.st_size == self.offset:
+            return 0
+
+        parsed = 0
+        with open(self.path, "rb") as file:
+            file.seek(self.offset)
+            while not self._stop.is_set():
+                chunk = file.read(READ_CHUNK)
+                if not chunk:
+                    break
+                self.offset += len(chunk)
+                data = self._partial + chunk
+                lines = data.split(b"\n")
+                self._partial = lines.pop()
+                parsed += self._ingest(lines, self.offset - len(self._partial))
+        return parsed
+
+    def _resume(self, stat):
+        if self.store is None:
+            # Sin almacén solo se cargan las últimas líneas del archivo
+            with open(self.path, "rb") as file:
+                self.offset = tail_offset(file, self.maxlen)
+            return
+        self.last_id = self.store.last_id()
+        alerts = self.store.recent(self.maxlen)
+        state = self.store.load_state()
+        backfill = self.store.load_backfill()
+        if backfill is not None and backfill[0] != stat.st_ino:
+            # Histórico de un archivo que ya rotó
+            self.store.clear_backfill()
+            backfill = None
+        if state is not None and state[0] == stat.st_ino and state[1] <= stat.st_size:
+            self.offset = state[1]
+        elif backfill is not None:
+            # Se paró antes de guardar nada en vivo: seguir donde empezaba
+            self.offset = backfill[2]
+        else:
+            # Primera ejecución o archivo rotado mientras la API estaba parada:
+            # en vivo desde las últimas líneas y el resto como histórico
+            with open(self.path, "rb") as file:
+                self.offset = tail_offset(file, self.maxlen)
+            if self.offset > 0:
+                # Cada línea ocupa al menos un byte: no hacen falta más ids
+                backfill = (stat.st_ino, 0, self.offset, self.last_id + self.offset)
+                self.store.start_backfill(stat.st_ino, self.offset, backfill[3])
+        if backfill is not None:
+            inode, offset, end, max_id = backfill
+            self._backfill = (inode, offset, end)
+            self._backfill_id = self.store.last_id(max_id)
+            self.last_id = max(self.last_id, max_id)
+            if self.coalesce_window:
+                self._backfill_coalescer = AlertCoalescer(self.coalesce_window)
+        with self._lock:
+            self._alerts.extend(alerts)
+            self.version = self.last_id
+
+    def backfill(self):
+        """Importa un bloque del histórico pendiente; devuelve ``True`` si queda más."""
+        if self._backfill is None:
+            return False
+        inode, offset, end = self._backfill
+        with open(self.path, "rb") as file:
+            if os.fstat(file.fileno()).st_ino != inode:
+                chunk = b""
+            else:
+                file.seek(offset)
+                chunk = file.read(min(READ_CHUNK, end - offset))
+        if not chunk:
+            # El archivo rotó o se truncó: ese histórico ya no está
+            self.store.clear_backfill()
+            self._backfill = None
+            return False
+        if offset + len(chunk) < end:
+            # Solo líneas completas; el resto va en el bloque siguiente
+            cut = chunk.rfind(b"\n") + 1
+            if cut:
+                chunk = chunk[:cut]
+        alerts = self._parse(chunk.split(b"\n"))
+        new, updates, absorbed = self._assign_ids(alerts, self._backfill_coalescer, self._next_backfill_id,
+                                                  self._backfill_id)
+        offset += len(chunk)
+        self.store.add_backfill(new, offset, updates=updates, absorbed=absorbed)
+        with self._lock:
+            self.version += 1
+        self._backfill = (inode, offset, end) if offset < end else None
+        return self._backfill is not None
+
+    def _parse(self, lines):
+        alerts = []
+        for raw in lines:
+            line = raw.decode("utf-8", errors="ignore").strip()
+            if not line:
+                continue
+            alert = self.parse(line)
+            if alert is not None:
+                alerts.append(alert)
+            else:
+                print(f"Error al parsear la línea: {line}")
+        return alerts
+
+    def _assign_ids(self, alerts, coalescer, next_id, previous):
+        # Devuelve (nuevas, actualizadas, absorbidas); previous es el último
+        # id asignado antes del lote
+        if coalescer is None:
+            for alert in alerts:
+                alert["id"] = next_id()
+            return alerts, [], []
+        records, absorbed = coalescer.feed(alerts, next_id)
+        new = [record for record in records if record["id"] > previous]
+        updates = [record for record in records if record["id"] <= previous]
+        return new, updates, absorbed
+
+    def _ingest(self, lines, offset):
+        alerts = self._parse(lines)
+        new, updates, absorbed = self._assign_ids(alerts, self.coalescer, self._next_id, self.last_id)
+        if self.store is not None:
+            self.store.add(new, self.inode, offset, updates=updates, absorbed=absorbed)
+        if new or updates:
+            with self._lock:
+                self._alerts.extend(new)
+                self._replace(updates)
+                self.version += 1
+            if self.on_alerts is not None:
+                self.on_alerts(new + updates)
+        return len(alerts)
+
+    def _next_id(self):
+        self.last_id += 1
+        return self.last_id
+
+    def _next_backfill_id(self):
+        self._backfill_id += 1
+        return self._backfill_id
+
+    def _replace(self, records):
+        if not records or not self._alerts:
+            return
+        # Los ids del final del anillo son consecutivos (puede haber un salto
+        # más atrás, tras el histórico): la posición sale del último
+        last = self._alerts[-1]["id"]
+        for record in records:
+            i = len(self._alerts) - 1 - (last - record["id"])
+            if 0 <= i < len(self._alerts) and self._alerts[i]["id"] == record["id"]:
+                self._alerts[i] = record
@@ -1,6 +1,8 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List
+from typing import List, Optional
+from datetime import datetime, timezone
 from pydantic import BaseModel
 import os
 import subprocess
@@ -8,6 +10,23 @@ import time
 import uvicorn
 import threading
 import json
+import asyncio
+import hashlib
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from alert_cache import EncodedAlertCache
+from alert_broadcast import AlertBroadcaster, encode_event, sse_event
+from alert_export import (COLUMNAR_FORMATS, EXPORT_FORMATS, choose_encoding, columnar_chunks,
+                          compress_chunks, csv_chunks, ndjson_chunks, pa)
+from alert_filter import AlertFilter
+from alert_parser import parse_line
+from alert_store import SKETCH_DIMENSIONS, STATS_DIMENSIONS, AlertStore
+from alert_tail import AlertTailer, read_last_lines
+from ip_ranges import NetworkSet
+from passwords import PasswordHasher, hash_password, is_hashed
+from people_store import PeopleStore, normalize_email
+from sessions import SessionManager
 
 app = FastAPI()
 
@@ -18,99 +37,623 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Sin esto el navegador no deja leer la cabecera de paginación
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Modelo de alerta
 class Alert(BaseModel):
+    id: Optional[int] = None
     timestamp: str
     ip_src: str
     ip_dst: str
     protocol: str
     alert: str
     description: str
+    gid: Optional[int] = None
+    sid: Optional[int] = None
+    rev: Optional[int] = None
+    classification: Optional[str] = None
+    priority: Optional[int] = None
+    src_port: Optional[int] = None
+    dst_port: Optional[int] = None
+    count: int = 1
+    first_seen: Optional[str] = None
+    last_seen: Optional[str] = None
 
-# Modelo de persona
+# Modelo de persona; password se guarda como hash de scrypt
 class Person(BaseModel):
     name: str
     email: str
     password: str
 
-# Base de datos en memoria
-people_db = []
+# Persona tal como la devuelve la API, sin la contraseña
+class PersonPublic(BaseModel):
+    name: str
+    email: str
+
+# Datos de inicio de sesión
+class Credentials(BaseModel):
+    email: str
+    password: str
 
 # Archivo JSON donde se guardan los usuarios
 DATA_FILE = "people_db.json"
 
-def load_people():
-    global people_db
-    if os.path.exists(DATA_FILE):
-        with open(DATA_FILE, "r") as file:
-            data = json.load(file)
-            people_db = [Person(**item) for item in data]
-
-def save_people():
-    with open(DATA_FILE, "w") as file:
-        json.dump([person.dict() for person in people_db], file, indent=4)
+# Base de datos en memoria, indexada por email; los cambios se guardan en
+# un diario junto a DATA_FILE que se compacta periódicamente
+people_db = PeopleStore(DATA_FILE, Person)
 
 # Cargar personas al iniciar
-load_people()
-
-@app.get("/api/alerts", response_model=List[Alert])
-async def get_alerts():
-    alert_path = r'C:\Snort\log\alert.ids'
-    if not os.path.exists(alert_path):
-        raise HTTPException(status_code=404, detail="Archivo de alertas no encontrado")
-    
+people_db.load()
+
+# Coste de scrypt para las contraseñas (python -m passwords --target-ms 100
+# propone valores para este equipo) e hilos que calculan los hashes
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+HASH_WORKERS = 4
+password_hasher = PasswordHasher(n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P, workers=HASH_WORKERS)
+# Tarea que sustituye las contraseñas en claro al arrancar
+password_migration = None
+# Hash con el que se compara la contraseña cuando el email no existe
+DUMMY_PASSWORD_HASH = hash_password(os.urandom(16).hex(), SCRYPT_N, SCRYPT_R, SCRYPT_P)
+
+# Clave para firmar los tokens de sesión; con None se genera una al arrancar
+# y los tokens dejan de valer al reiniciar
+SESSION_SECRET = None
+# Emails que pueden borrar a otras personas; el resto solo puede borrar su
+# propia cuenta
+ADMIN_EMAILS = set()
+
+def stored_password(email):
+    person = people_db.get(email)
+    return person.password if person is not None else None
+
+# La contraseña se verifica una vez en /api/login; después cada petición
+# solo valida el token, casi siempre con una búsqueda en la caché
+sessions = SessionManager(stored_password, secret=SESSION_SECRET)
+
+def bearer_token(authorization, access_token):
+    if authorization:
+        scheme, _, token = authorization.partition(" ")
+        if scheme.lower() == "bearer" and token.strip():
+            return token.strip()
+    return access_token
+
+def unauthorized():
+    return HTTPException(status_code=401, detail="Token ausente, inválido o caducado",
+                         headers={"WWW-Authenticate": "Bearer"})
+
+async def optional_session(authorization: Optional[str] = Header(None)):
+    # Solo la cabecera: el log de accesos guarda la query string completa.
+    # async: sin pasar por el threadpool
+    token = bearer_token(authorization, None)
+    return sessions.validate(token) if token else None
+
+async def require_session(email: Optional[str] = Depends(optional_session)):
+    if email is None:
+        raise unauthorized()
+    return email
+
+async def require_stream_session(authorization: Optional[str] = Header(None), access_token: Optional[str] = None):
+    # access_token en la URL solo para EventSource, que no puede enviar la
+    # cabecera Authorization
+    token = bearer_token(authorization, access_token)
+    email = sessions.validate(token) if token else None
+    if email is None:
+        raise unauthorized()
+    return email
+
+def is_admin(email):
+    return email in {normalize_email(admin) for admin in ADMIN_EMAILS}
+
+def make_etag(*parts):
+    digest = hashlib.blake2b(":".join(map(str, parts)).encode(), digest_size=12).hexdigest()
+    return f'"{digest}"'
+
+def etag_matches(request, etag):
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    return header.strip() == "*" or etag in (tag.strip() for tag in header.split(","))
+
+# Archivo de alertas de Snort y lector incremental en segundo plano
+ALERT_FILE = r'C:\Snort\log\alert.ids'
+MAX_ALERTS = 3000
+# Máximo de alertas por página en /api/alerts; para más, paginar con cursor
+MAX_QUERY_ALERTS = 10000
+# Base de datos local con el histórico de alertas
+ALERT_DB = "alerts.db"
+
+# Ventana en segundos para agregar ráfagas de alertas iguales (mismo sid,
+# origen, destino y protocolo) en un solo registro con count; None la desactiva
+COALESCE_WINDOW = None
+
+# Segundos entre comentarios de keep-alive en el stream de alertas
+STREAM_HEARTBEAT = 15
+# Ráfagas agregadas por conexión de las que se recuerda el último count
+# enviado, para no repetir un evento que el cliente ya tiene
+STREAM_SENT_COUNTS = 10000
+# Intervalos máximos que devuelve un histograma
+MAX_HISTOGRAM_BUCKETS = 10000
+HISTOGRAM_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+# Memoria máxima para el JSON ya codificado de las alertas
+ALERT_CACHE_BYTES = 32 * 1024 * 1024
+# Hilos para la E/S de disco de los endpoints (archivo de alertas y SQLite)
+IO_WORKERS = 8
+
+# Pool acotado propio: una lectura lenta de alertas ocupa uno de sus hilos,
+# pero no el bucle de eventos ni el threadpool por defecto de FastAPI
+io_executor = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="api-io")
+
+async def run_io(func, *args, **kwargs):
+    return await asyncio.get_running_loop().run_in_executor(io_executor, partial(func, *args, **kwargs))
+
+async def iterate_io(chunks):
+    # Recorre un generador síncrono (una exportación) pidiendo cada lote a
+    # io_executor en lugar de al threadpool de Starlette
+    future = None
     try:
-        with open(alert_path, 'r', encoding='utf-8', errors='ignore') as file:
-            lines = file.readlines()
-        lines = lines[-3000:]
+        while True:
+            future = io_executor.submit(next, chunks, None)
+            chunk = await asyncio.wrap_future(future)
+            if chunk is None:
+                return
+            yield chunk
+    finally:
+        # Cerrarlo (y con él su conexión a SQLite) cuando acabe el lote en
+        # curso, también si el cliente cortó la descarga
+        if future is None:
+            io_executor.submit(chunks.close)
+        else:
+            future.add_done_callback(lambda _: io_executor.submit(chunks.close))
 
-        alerts = []
-        for line in lines:
-            try:
-                alert_data = {
-                    "timestamp": line.split(" ")[0],
-                    "ip_src": line.split(" ")[-4],
-                    "ip_dst": line.split(" ")[-3],
-                    "protocol": line.split(" ")[-2],
-                    "alert": line.split(" ")[1],
-                    "description": line.split("[**]")[1].split("[Classification:")[0].strip()
-                }
-                alerts.append(alert_data)
-            except Exception as parse_error:
-                print(f"Error al parsear la línea: {line}\nDetalle: {parse_error}")
-        return alerts
+alert_store = AlertStore(ALERT_DB)
+alert_cache = EncodedAlertCache(ALERT_CACHE_BYTES)
+alert_broadcaster = AlertBroadcaster(encode=alert_cache.encode)
+
+def on_new_alerts(alerts):
+    alert_cache.add(alerts)
+    alert_broadcaster.publish(alerts)
+
+alert_tailer = AlertTailer(ALERT_FILE, parse_line, maxlen=MAX_ALERTS, store=alert_store,
+                           on_alerts=on_new_alerts, coalesce_window=COALESCE_WINDOW)
+
+def parse_networks(cidrs):
+    if not cidrs:
+        return None
+    try:
+        # Se admite tanto ?src_cidr=a&src_cidr=b como ?src_cidr=a,b
+        return NetworkSet(cidr for value in cidrs for cidr in value.split(",") if cidr.strip())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"CIDR inválido: {e}")
+
+def to_epoch_us(value):
+    return round(value.timestamp() * 1_000_000) if value is not None else None
+
+@app.on_event("startup")
+async def start_alert_tailer():
+    alert_broadcaster.attach(asyncio.get_running_loop())
+    alert_tailer.start()
+
+async def hash_plaintext_passwords():
+    # Contraseñas guardadas en claro antes de usar scrypt. Se calculan de
+    # HASH_WORKERS * 2 en HASH_WORKERS * 2 para que un login no espere detrás
+    # de toda la migración.
+    pending = [person for person in people_db.all() if not is_hashed(person.password)]
+    migrated = 0
+    for start in range(0, len(pending), HASH_WORKERS * 2):
+        batch = pending[start:start + HASH_WORKERS * 2]
+        hashes = await asyncio.gather(*(password_hasher.hash(person.password) for person in batch))
+        commits = []
+        for person, hashed in zip(batch, hashes):
+            # Solo si nadie la borró, la registró de nuevo o entró con ella
+            # (login ya guarda el hash) mientras se calculaba
+            if people_db.get(person.email) is person:
+                commits.append(asyncio.wrap_future(
+                    people_db.replace(person.model_copy(update={"password": hashed}))))
+        await asyncio.gather(*commits)
+        migrated += len(commits)
+    if migrated:
+        # Nueva instantánea sin esperar a la compactación: ni people_db.json
+        # ni el diario conservan las contraseñas en claro
+        await run_io(people_db.save)
+        print(f"[+] {migrated} contraseñas guardadas como hash")
+
+async def migrate_passwords():
+    try:
+        await hash_plaintext_passwords()
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        print(f"Error al migrar las contraseñas: {e}")
+
+@app.on_event("startup")
+async def start_password_migration():
+    # En segundo plano: con decenas de miles de cuentas la migración tarda
+    # minutos y la API atiende peticiones mientras tanto
+    global password_migration
+    password_migration = asyncio.create_task(migrate_passwords())
+
+@app.on_event("shutdown")
+def stop_alert_tailer():
+    if password_migration is not None:
+        password_migration.cancel()
+    alert_tailer.stop()
+    people_db.close()
+    io_executor.shutdown(wait=False)
+    password_hasher.shutdown()
+
+def alerts_etag(request, *parts):
+    # Se calcula antes de leer las alertas: el contenido servido nunca es más
+    # antiguo que la posición usada para el ETag.
+    if alert_tailer.ready:
+        inode, offset, version = alert_tailer.position()
+    else:
+        try:
+            stat = os.stat(ALERT_FILE)
+        except OSError:
+            return None
+        inode, offset, version = stat.st_ino, stat.st_size, 0
+    return make_etag("alerts", inode, offset, version, request.url.query, *parts)
+
+async def conditional_etag(request, *parts):
+    # Un 304 si el cliente ya tiene la versión actual; si no, las cabeceras
+    # con el ETag para la respuesta. parts: lo que cambia la respuesta además
+    # de las alertas y la query string
+    etag = await run_io(alerts_etag, request, *parts)
+    if etag is None:
+        return {}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return {"ETag": etag}
+
+def alert_filters(
+    ip_src: Optional[str] = None,
+    ip_dst: Optional[str] = None,
+    ip: Optional[str] = None,
+    protocol: Optional[str] = None,
+    sid: Optional[int] = None,
+    priority: Optional[int] = None,
+    description: Optional[str] = None,
+    description_prefix: Optional[str] = None,
+    src_cidr: Optional[List[str]] = Query(None),
+    dst_cidr: Optional[List[str]] = Query(None),
+):
+    return {
+        "ip_src": ip_src, "ip_dst": ip_dst, "ip": ip, "protocol": protocol, "sid": sid,
+        "priority": priority, "description": description, "description_prefix": description_prefix,
+        "src_cidr": parse_networks(src_cidr), "dst_cidr": parse_networks(dst_cidr),
+    }
+
+@app.get("/api/alerts", response_model=List[Alert], dependencies=[Depends(require_session)])
+async def get_alerts(
+    request: Request,
+    limit: int = Query(MAX_ALERTS, ge=1, le=MAX_QUERY_ALERTS),
+    cursor: Optional[int] = Query(None, ge=1),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    filters: dict = Depends(alert_filters),
+):
+    headers = await conditional_etag(request)
+    if isinstance(headers, Response):
+        return headers
+
+    alerts, content = await run_io(read_alerts, limit, cursor, since, until, filters)
+    # Cursor para pedir la página anterior del histórico
+    if len(alerts) == limit and (alerts[0]["id"] or 0) > 1:
+        headers["X-Next-Cursor"] = str(alerts[0]["id"])
+    return Response(content=content, media_type="application/json", headers=headers)
+
+def read_alerts(limit, cursor, since, until, filters):
+    # Se ejecuta en io_executor: lee el archivo o SQLite y codifica el JSON
+    filtered = any(value is not None for value in filters.values())
+    if not filtered and cursor is None and since is None and until is None and limit <= MAX_ALERTS:
+        if not os.path.exists(ALERT_FILE):
+            raise HTTPException(status_code=404, detail="Archivo de alertas no encontrado")
+        if not alert_tailer.ready:
+            # El lector aún no arrancó: leer solo el final del archivo
+            try:
+                lines = read_last_lines(ALERT_FILE, limit)
+            except Exception as e:
+                raise HTTPException(status_code=500, detail=str(e))
+            # Como mucho MAX_ALERTS líneas que se convierten enseguida en
+            # filas: línea a línea es más rápido que parse_buffer
+            alerts = [{"id": None, **alert} for alert in map(parse_line, lines) if alert is not None]
+        else:
+            alerts = alert_tailer.recent(limit)
+    else:
+        alerts = alert_store.query(since=to_epoch_us(since), until=to_epoch_us(until),
+                                   limit=limit, before=cursor, **filters)
+    # Las alertas ya vienen del parser con la forma de Alert: se sirven con
+    # el JSON cacheado de cada una, sin validarlas con Pydantic.
+    return alerts, alert_cache.encode_list(alerts)
+
+@app.get("/api/alerts/export", dependencies=[Depends(require_session)])
+async def export_alerts(
+    request: Request,
+    export_format: str = Query("ndjson", alias="format"),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    filters: dict = Depends(alert_filters),
+):
+    if export_format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Formato no soportado: {export_format}")
+    media_type, extension = EXPORT_FORMATS[export_format]
+    query = dict(since=to_epoch_us(since), until=to_epoch_us(until), **filters)
+    headers = {"Content-Disposition": f'attachment; filename="alerts.{extension}"'}
+    if export_format in COLUMNAR_FORMATS:
+        if pa is None:
+            raise HTTPException(status_code=501, detail="Exportación columnar no disponible: falta pyarrow")
+        # Arrow y Parquet ya son binarios compactos: no se comprimen otra vez
+        return StreamingResponse(iterate_io(columnar_chunks(alert_store, export_format, **query)),
+                                 media_type=media_type, headers=headers)
+
+    writer = ndjson_chunks if export_format == "ndjson" else csv_chunks
+    chunks = writer(alert_store, **query)
+    headers["Vary"] = "Accept-Encoding"
+    encoding = choose_encoding(request.headers.get("accept-encoding"))
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    # Memoria constante: los primeros bytes salen en cuanto se lee el primer
+    # lote del almacén.
+    return StreamingResponse(iterate_io(compress_chunks(chunks, encoding)), media_type=media_type,
+                             headers=headers)
+
+@app.get("/api/alerts/stats", dependencies=[Depends(require_session)])
+async def get_alert_stats(
+    request: Request,
+    group_by: str = Query(...),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = Query(10, ge=1, le=1000),
+    approx: bool = False,
+    sid: Optional[int] = None,
+):
+    # approx=true (o sid) usa los sketches por hora de ip_src/ip_dst: memoria
+    # fija aunque haya millones de IPs distintas, a cambio de resultados
+    # aproximados con cotas de error.
+    sketched = approx or sid is not None
+    dimensions = SKETCH_DIMENSIONS if sketched else STATS_DIMENSIONS
+    if group_by not in dimensions:
+        raise HTTPException(status_code=400, detail=f"group_by debe ser uno de: {', '.join(dimensions)}")
+    headers = await conditional_etag(request)
+    if isinstance(headers, Response):
+        return headers
+    if sketched:
+        stats = await run_io(alert_store.sketch_stats, group_by, since=to_epoch_us(since),
+                             until=to_epoch_us(until), sid=sid, limit=limit)
+        # distinct_error: error estándar relativo del HyperLogLog. Cada cuenta
+        # de top sobrestima como mucho su "error" y toda clave con más de
+        # error_bound alertas aparece en la lista.
+        body = {"group_by": group_by, "approximate": True, "sid": sid, "total": stats["total"],
+                "distinct": stats["distinct"], "distinct_error": stats["distinct_error"],
+                "error_bound": stats["error_bound"],
+                "top": [{"key": key, "count": count, "error": error} for key, count, error in stats["top"]]}
+        return Response(content=json.dumps(body), media_type="application/json", headers=headers)
+    # Contadores por hora mantenidos en la ingesta: el coste no crece con el histórico
+    total, keys, top = await run_io(alert_store.stats, group_by, since=to_epoch_us(since),
+                                    until=to_epoch_us(until), limit=limit)
+    body = {"group_by": group_by, "total": total, "keys": keys,
+            "top": [{"key": key, "count": count} for key, count in top]}
+    return Response(content=json.dumps(body), media_type="application/json", headers=headers)
+
+@app.get("/api/alerts/histogram", dependencies=[Depends(require_session)])
+async def get_alert_histogram(
+    request: Request,
+    interval: str = "1m",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    sid: Optional[int] = None,
+    protocol: Optional[str] = None,
+    priority: Optional[int] = None,
+):
+    match = re.fullmatch(r"(\d+)([smhd])", interval)
+    if match is None or int(match.group(1)) == 0:
+        raise HTTPException(status_code=400, detail="interval debe tener la forma 30s, 1m, 1h, 1d...")
+    step = int(match.group(1)) * HISTOGRAM_UNITS[match.group(2)] * 1_000_000
+    end = to_epoch_us(until) if until is not None else int(time.time() * 1_000_000)
+    # Por defecto, las últimas 24 horas
+    start = to_epoch_us(since) if since is not None else end - 86400 * 1_000_000
+    if start > end:
+        raise HTTPException(status_code=400, detail="since debe ser anterior a until")
+    first, last = start // step, end // step
+    if last - first + 1 > MAX_HISTOGRAM_BUCKETS:
+        raise HTTPException(status_code=400, detail=f"Demasiados intervalos (máximo {MAX_HISTOGRAM_BUCKETS})")
+
+    # Sin until la ventana avanza con el reloj aunque no lleguen alertas
+    headers = await conditional_etag(request, first, last)
+    if isinstance(headers, Response):
+        return headers
+    # Rollups por segundo, minuto y hora mantenidos en la ingesta
+    counts = await run_io(alert_store.histogram, step, start, end, sid=sid, protocol=protocol,
+                          priority=priority)
+    buckets = [
+        {"start": datetime.fromtimestamp(slot * step / 1_000_000, timezone.utc).isoformat(),
+         "count": counts.get(slot * step, 0)}
+        for slot in range(first, last + 1)
+    ]
+    body = {"interval": interval, "buckets": buckets}
+    return Response(content=json.dumps(body), media_type="application/json", headers=headers)
+
+@app.get("/api/alerts/cache", dependencies=[Depends(require_session)])
+async def get_alert_cache_stats():
+    return alert_cache.stats()
+
+@app.get("/api/alerts/stream", dependencies=[Depends(require_stream_session)])
+async def stream_alerts(request: Request, last_event_id: Optional[str] = Header(None)):
+    try:
+        last_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_id = None
+
+    # id -> último count enviado de las ráfagas agregadas (count > 1)
+    sent_counts = {}
+
+    def remember(alert):
+        if alert["count"] > 1:
+            sent_counts[alert["id"]] = alert["count"]
+            if len(sent_counts) > STREAM_SENT_COUNTS:
+                del sent_counts[next(iter(sent_counts))]
+
+    async def events():
+        nonlocal last_id
+        # Suscribirse antes de leer el histórico para no perder alertas
+        # intermedias, y dentro del generador: si el cliente se va antes de
+        # empezar a leer, el generador nunca arranca y no queda suscripción
+        subscription = alert_broadcaster.subscribe()
+        try:
+            if last_id is not None:
+                # Reenviar lo ocurrido desde el último evento que recibió el cliente
+                while True:
+                    missed = await run_io(alert_store.after, last_id, limit=1000)
+                    for alert in missed:
+                        remember(alert)
+                        yield encode_event(alert)
+                    if missed:
+                        last_id = missed[-1]["id"]
+                    if len(missed) < 1000:
+                        break
+            while not await request.is_disconnected():
+                try:
+                    batch = await asyncio.wait_for(subscription.get(), timeout=STREAM_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+                    continue
+                if batch is None:
+                    # Cliente demasiado lento: se corta y reconecta con Last-Event-ID
+                    break
+                for alert, data in batch:
+                    # Una ráfaga agregada se reenvía con el mismo id cada vez
+                    # que cambia su count, pero no con un count que ya se
+                    # envió (por ejemplo en el reenvío desde Last-Event-ID)
+                    if (last_id is None or alert["id"] > last_id
+                            or alert["count"] > sent_counts.get(alert["id"], 1)):
+                        remember(alert)
+                        yield sse_event(alert["id"], data)
+                        last_id = alert["id"] if last_id is None else max(last_id, alert["id"])
+        finally:
+            alert_broadcaster.unsubscribe(subscription)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.websocket("/api/alerts/ws")
+async def alerts_websocket(websocket: WebSocket, access_token: Optional[str] = None):
+    token = bearer_token(websocket.headers.get("authorization"), access_token)
+    if not token or sessions.validate(token) is None:
+        # Cerrar antes de aceptar responde 403 al handshake
+        await websocket.close(code=1008)
+        return
+    await websocket.accept()
+    # El primer mensaje del cliente es el filtro; puede enviar otro en cualquier momento
+    try:
+        alert_filter = AlertFilter.from_spec(await websocket.receive_json())
+    except WebSocketDisconnect:
+        return
+    except ValueError as e:
+        await websocket.send_json({"type": "error", "detail": f"Filtro inválido: {e}"})
+        await websocket.close(code=1003)
+        return
+    subscription = alert_broadcaster.subscribe(alert_filter, overflow="drop")
+
+    async def receive_filters():
+        while True:
+            try:
+                subscription.alert_filter = AlertFilter.from_spec(await websocket.receive_json())
+            except ValueError as e:
+                await websocket.send_json({"type": "error", "detail": f"Filtro inválido: {e}"})
+
+    receiver = asyncio.create_task(receive_filters())
+    try:
+        while not receiver.done():
+            getter = asyncio.ensure_future(subscription.get())
+            done, _ = await asyncio.wait({getter, receiver}, return_when=asyncio.FIRST_COMPLETED)
+            if getter not in done:
+                getter.cancel()
+                break
+            batch = getter.result()
+            dropped = subscription.take_dropped()
+            if dropped:
+                # Cliente lento: se avisa de cuántas alertas se descartaron
+                await websocket.send_json({"type": "dropped", "count": dropped})
+            for alert, data in batch:
+                await websocket.send_text('{"type":"alert","alert":%s}' % data.decode("utf-8"))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
+        if receiver.done() and not receiver.cancelled():
+            # Normalmente WebSocketDisconnect del cliente
+            receiver.exception()
+        alert_broadcaster.unsubscribe(subscription)
+
+@app.post("/api/login")
+async def login(credentials: Credentials):
+    person = people_db.get(credentials.email)
+    # Con un email desconocido también se calcula un hash: la respuesta tarda
+    # lo mismo exista o no la persona
+    stored = person.password if person is not None else DUMMY_PASSWORD_HASH
+    valid = await password_hasher.verify(credentials.password, stored)
+    if person is None or not valid:
+        raise HTTPException(status_code=401, detail="Email o contraseña incorrectos",
+                            headers={"WWW-Authenticate": "Bearer"})
+    if password_hasher.needs_rehash(person.password):
+        # Hash con un coste antiguo: se guarda con el actual
+        hashed = await password_hasher.hash(credentials.password)
+        if people_db.get(person.email) is person:
+            person = person.model_copy(update={"password": hashed})
+            await asyncio.wrap_future(people_db.replace(person))
+    token = sessions.issue(normalize_email(person.email), person.password)
+    return {"access_token": token, "token_type": "bearer", "expires_in": sessions.ttl}
 
 @app.post("/api/persons")
-async def register_person(person: Person):
-    for existing_person in people_db:
-        if existing_person.email == person.email:
-            raise HTTPException(status_code=400, detail="La persona con este email ya está registrada.")
-    people_db.append(person)
-    save_people()
-    return {"message": "Persona registrada exitosamente", "person": person}
-
-@app.get("/api/persons", response_model=List[Person])
-async def get_all_persons():
-    if not people_db:
+async def register_person(person: Person, caller: Optional[str] = Depends(optional_session)):
+    # Solo la primera cuenta se registra sin sesión; después da de alta
+    # personas quien ya tiene una
+    if caller is None and len(people_db):
+        raise unauthorized()
+    # Comprobar antes de gastar un hash en un email ya registrado
+    if people_db.get(person.email) is not None:
+        raise HTTPException(status_code=400, detail="La persona con este email ya está registrada.")
+    hashed = await password_hasher.hash(person.password)
+    # Mientras se calculaba el hash otra petición pudo registrar la primera
+    if caller is None and len(people_db):
+        raise unauthorized()
+    committed = people_db.add(person.model_copy(update={"password": hashed}))
+    if committed is None:
+        raise HTTPException(status_code=400, detail="La persona con este email ya está registrada.")
+    # Responder solo cuando el alta está en disco
+    await asyncio.wrap_future(committed)
+    return {"message": "Persona registrada exitosamente",
+            "person": PersonPublic(name=person.name, email=person.email)}
+
+@app.get("/api/persons", response_model=List[PersonPublic], dependencies=[Depends(require_session)])
+async def get_all_persons(request: Request, response: Response):
+    etag = make_etag("persons", people_db.epoch, people_db.version)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    people = people_db.all()
+    if not people:
         raise HTTPException(status_code=404, detail="No hay personas registradas.")
-    return people_db
+    return people
 
-@app.get("/api/persons/{email}", response_model=Person)
+@app.get("/api/persons/{email}", response_model=PersonPublic, dependencies=[Depends(require_session)])
 async def get_person(email: str):
-    for person in people_db:
-        if person.email == email:
-            return person
+    person = people_db.get(email)
+    if person is not None:
+        return person
     raise HTTPException(status_code=404, detail="Persona no encontrada")
 
 @app.delete("/api/persons/{email}")
-async def delete_person(email: str):
-    global people_db
-    people_db = [person for person in people_db if person.email != email]
-    save_people()
+async def delete_person(email: str, caller: str = Depends(require_session)):
+    if normalize_email(email) != caller and not is_admin(caller):
+        raise HTTPException(status_code=403, detail="Solo puedes eliminar tu propia cuenta.")
+    committed = people_db.delete(email)
+    # Los tokens de la persona dejan de valer en cuanto se borra
+    sessions.revoke(normalize_email(email))
+    if committed is not None:
+        await asyncio.wrap_future(committed)
     return {"message": "Persona eliminada exitosamente"}
 
 # Configuración de Snort
@@ -0,0 +1,67 @@
+"""Benchmark del parseo por lotes (columnar) frente al parseo línea a línea.
+
+Mide ``parse_buffer`` solo (las columnas) y construyendo además todas las
+filas, que es lo que cuesta servirlas como ``Alert``. Con ``--memory``, la
+memoria retenida por el resultado.
+
+    python -m benchmarks.bench_batch --lines 1000000
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from alert_parser import parse_buffer, parse_line  # noqa: E402
+from benchmarks.bench_parser import CORPUS, load_corpus  # noqa: E402
+
+
+def per_line(data):
+    alerts = []
+    for line in data.decode("utf-8", errors="ignore").splitlines():
+        alert = parse_line(line)
+        if alert is not None:
+            alerts.append(alert)
+    return alerts
+
+
+def buffer_rows(data):
+    return list(parse_buffer(data))
+
+
+def measure(func, data, trace):
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    result = func(data)
+    elapsed = time.perf_counter() - start
+    memory = (0, 0)
+    if trace:
+        memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return result, elapsed, memory
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", default=CORPUS)
+    parser.add_argument("--lines", type=int, default=1000000)
+    parser.add_argument("--memory", action="store_true", help="medir memoria pico (más lento)")
+    args = parser.parse_args()
+
+    data = ("\n".join(load_corpus(args.corpus, args.lines)) + "\n").encode()
+    print(f"{args.lines} líneas, {len(data) / (1 << 20):.1f} MiB")
+    for name, func in (("por línea", per_line), ("parse_buffer", parse_buffer),
+                       ("buffer + filas", buffer_rows)):
+        result, elapsed, (current, peak) = measure(func, data, args.memory)
+        assert len(result) == args.lines
+        memory = ""
+        if args.memory:
+            memory = f", retenida {current / (1 << 20):.1f} MiB, pico {peak / (1 << 20):.1f} MiB"
+        print(f"{name:>14}: {elapsed:6.2f} s, {args.lines / elapsed:12,.0f} líneas/s{memory}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Benchmark de filtros CIDR sobre alertas.
+
+Mide la pertenencia de IPs a un ``NetworkSet`` con miles de redes frente a
+comprobar red por red con ``ipaddress``, y consultas ``src_cidr`` sobre un
+almacén SQLite generado.
+
+    python -m benchmarks.bench_cidr --networks 10000 --alerts 10000000
+"""
+import argparse
+import ipaddress
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from alert_store import AlertStore  # noqa: E402
+from ip_ranges import NetworkSet, ip_key  # noqa: E402
+
+INSERT = ("INSERT INTO alerts (id, ts, timestamp, ip_src, ip_dst, protocol, alert, description, "
+          "gid, sid, rev, classification, priority, src_port, dst_port, src_key, dst_key) "
+          "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)")
+
+
+def random_ip(rng, v6_ratio):
+    if rng.random() < v6_ratio:
+        return str(ipaddress.IPv6Address(rng.getrandbits(128)))
+    return str(ipaddress.IPv4Address(rng.getrandbits(32)))
+
+
+def random_networks(rng, count):
+    networks = []
+    for _ in range(count):
+        if rng.random() < 0.2:
+            prefix = rng.randint(32, 64)
+            address = ipaddress.IPv6Address(rng.getrandbits(128))
+        else:
+            prefix = rng.randint(8, 28)
+            address = ipaddress.IPv4Address(rng.getrandbits(32))
+        networks.append(str(ipaddress.ip_network(f"{address}/{prefix}", strict=False)))
+    return networks
+
+
+def bench_membership(rng, cidrs, lookups, v6_ratio):
+    networks = NetworkSet(cidrs)
+    ips = [random_ip(rng, v6_ratio) for _ in range(lookups)]
+    start = time.perf_counter()
+    hits = sum(1 for ip in ips if ip in networks)
+    elapsed = time.perf_counter() - start
+    print(f"NetworkSet ({len(cidrs)} redes, {len(networks)} intervalos): "
+          f"{lookups / elapsed:,.0f} búsquedas/s, {hits} aciertos")
+
+    # Comparación red por red solo sobre una muestra: es O(redes) por IP
+    sample = ips[:max(1, lookups // 1000)]
+    parsed = [ipaddress.ip_network(cidr) for cidr in cidrs]
+    start = time.perf_counter()
+    for ip in sample:
+        address = ipaddress.ip_address(ip)
+        any(address in network for network in parsed if network.version == address.version)
+    elapsed = time.perf_counter() - start
+    print(f"ipaddress red por red: {len(sample) / elapsed:,.0f} búsquedas/s")
+
+
+def build_store(path, rng, total, v6_ratio):
+    store = AlertStore(path)
+    conn = store._connection()
+    batch = []
+    for i in range(1, total + 1):
+        src, dst = random_ip(rng, v6_ratio), random_ip(rng, v6_ratio)
+        batch.append((i, i, "01/01-00:00:00.000000", src, dst, "TCP", "1:1:1", "bench",
+                      1, 1, 1, None, 3, None, None, ip_key(src), ip_key(dst)))
+        if len(batch) == 100000:
+            conn.executemany(INSERT, batch)
+            conn.commit()
+            batch = []
+    if batch:
+        conn.executemany(INSERT, batch)
+        conn.commit()
+    return store
+
+
+def bench_store(rng, cidrs, total, v6_ratio, limit):
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        store = build_store(os.path.join(tmp, "alerts.db"), rng, total, v6_ratio)
+        print(f"almacén con {total:,} alertas generado en {time.perf_counter() - start:.1f} s")
+        for label, networks in (("una /16", NetworkSet(["10.20.0.0/16"])),
+                                ("una /8", NetworkSet(["10.0.0.0/8"])),
+                                (f"{len(cidrs)} redes", NetworkSet(cidrs))):
+            start = time.perf_counter()
+            alerts = store.query(limit=limit, src_cidr=networks)
+            print(f"  src_cidr={label}: {len(alerts)} alertas en {(time.perf_counter() - start) * 1000:.1f} ms")
+        store._connection().close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--networks", type=int, default=10000)
+    parser.add_argument("--lookups", type=int, default=1000000)
+    parser.add_argument("--alerts", type=int, default=1000000)
+    parser.add_argument("--limit", type=int, default=3000)
+    parser.add_argument("--v6-ratio", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    cidrs = random_networks(rng, args.networks)
+    bench_membership(rng, cidrs, args.lookups, args.v6_ratio)
+    if args.alerts:
+        bench_store(rng, cidrs, args.alerts, args.v6_ratio, args.limit)
+
+
+if __name__ == "__main__":
+    main()
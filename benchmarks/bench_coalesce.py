@@ -0,0 +1,75 @@
+"""Benchmark de la agregación de ráfagas en la ingesta.
+
+Genera un alert.ids con un escaneo de puertos (miles de líneas iguales
+salvo el puerto de origen) mezclado con alertas variadas y lo ingiere con
+``AlertTailer`` con y sin ``coalesce_window``: registros guardados, caudal
+de ingesta y cuántas alertas distintas caben en la ventana de 3000.
+
+    python -m benchmarks.bench_coalesce --lines 200000 --noise 0.05
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from alert_parser import format_timestamp, parse_line  # noqa: E402
+from alert_store import AlertStore  # noqa: E402
+from alert_tail import AlertTailer  # noqa: E402
+
+SCAN = ("{ts}  [**] [1:2001219:20] ET SCAN Potential SSH Scan [**] "
+        "[Classification: Attempted Information Leak] [Priority: 2] {{TCP}} 203.0.113.7:{port} -> 10.0.0.{host}:22")
+OTHER = ("{ts}  [**] [1:{sid}:1] Regla {sid} [**] [Priority: 3] {{UDP}} "
+         "10.1.{a}.{b}:{port} -> 10.0.0.1:53")
+
+
+def write_alerts(path, rng, lines, noise):
+    start = int(time.time() * 1_000_000) - lines * 1000
+    with open(path, "w") as file:
+        for i in range(lines):
+            ts = format_timestamp(start + i * 1000)
+            if rng.random() < noise:
+                file.write(OTHER.format(ts=ts, sid=rng.randint(1000000, 1000200), a=rng.randint(0, 255),
+                                        b=rng.randint(1, 254), port=rng.randint(1024, 65535)) + "\n")
+            else:
+                file.write(SCAN.format(ts=ts, port=rng.randint(1024, 65535), host=rng.randint(1, 4)) + "\n")
+
+
+def ingest(path, db, window):
+    store = AlertStore(db)
+    # Como si la API ya siguiera el archivo desde el principio: todo entra
+    # por la ingesta en vivo y no como histórico
+    store.add([], os.stat(path).st_ino, 0)
+    tailer = AlertTailer(path, parse_line, store=store, coalesce_window=window)
+    start = time.perf_counter()
+    lines = tailer.poll()
+    elapsed = time.perf_counter() - start
+    records = store.last_id()
+    window_alerts = sum(alert["count"] for alert in tailer.recent(3000))
+    store._connection().close()
+    return lines, records, elapsed, window_alerts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=200000)
+    parser.add_argument("--noise", type=float, default=0.05)
+    parser.add_argument("--window", type=float, default=5.0)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "alert.ids")
+        write_alerts(path, random.Random(args.seed), args.lines, args.noise)
+        for name, window in (("sin agregación", None), (f"ventana {args.window:g} s", args.window)):
+            lines, records, elapsed, window_alerts = ingest(path, os.path.join(tmp, f"{name}.db"), window)
+            print(f"{name:>15}: {lines:,} líneas -> {records:,} registros "
+                  f"({lines / records:,.1f}x), {lines / elapsed:,.0f} líneas/s; "
+                  f"las últimas 3000 entradas cubren {window_alerts:,} alertas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Benchmark de la exportación en streaming de alertas.
+
+Genera un almacén con ``--alerts`` alertas y mide el caudal (MB/s sin
+comprimir) de NDJSON y CSV, con y sin gzip, en un solo núcleo; con pyarrow
+instalado también Arrow IPC y Parquet.
+
+    python -m benchmarks.bench_export --alerts 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from alert_export import columnar_chunks, compress_chunks, csv_chunks, ndjson_chunks, pa  # noqa: E402
+from benchmarks.bench_cidr import build_store  # noqa: E402
+
+
+def measure(chunks_factory, encoding):
+    raw = 0
+    out = 0
+
+    def counted():
+        nonlocal raw
+        for chunk in chunks_factory():
+            raw += len(chunk)
+            yield chunk
+
+    start = time.perf_counter()
+    for data in compress_chunks(counted(), encoding):
+        out += len(data)
+    return raw, out, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--alerts", type=int, default=1000000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = build_store(os.path.join(tmp, "alerts.db"), random.Random(args.seed), args.alerts, 0.1)
+        print(f"{args.alerts:,} alertas, JSON1 de SQLite: {'sí' if store.has_json else 'no'}")
+        for name, writer in (("ndjson", ndjson_chunks), ("csv", csv_chunks)):
+            for encoding in (None, "gzip"):
+                raw, out, elapsed = measure(lambda: writer(store), encoding)
+                print(f"{name:>7} {encoding or 'sin comprimir':>14}: {raw / elapsed / 1e6:7.1f} MB/s "
+                      f"({raw / 1e6:.0f} MB -> {out / 1e6:.0f} MB en {elapsed:.2f} s)")
+        for name in ("arrow", "parquet") if pa is not None else ():
+            raw, _, elapsed = measure(lambda: columnar_chunks(store, name), None)
+            print(f"{name:>7} {'sin comprimir':>14}: {args.alerts / elapsed:9,.0f} alertas/s "
+                  f"({raw / 1e6:.0f} MB en {elapsed:.2f} s)")
+        store._connection().close()
+
+
+if __name__ == "__main__":
+    main()
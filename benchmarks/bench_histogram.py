@@ -0,0 +1,57 @@
+"""Benchmark de /api/alerts/histogram.
+
+Ingiere ``--alerts`` alertas en ``--hours`` horas y compara los histogramas
+habituales (por minuto en 24 h, por hora en todo el histórico) leídos de los rollups
+frente a agrupar las alertas del rango.
+
+    python -m benchmarks.bench_histogram --alerts 1000000 --hours 720
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from alert_store import AlertStore  # noqa: E402
+from benchmarks.bench_stats import ingest, timed  # noqa: E402
+
+HOUR = 3600 * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--alerts", type=int, default=1000000)
+    parser.add_argument("--hours", type=int, default=720)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = AlertStore(os.path.join(tmp, "alerts.db"))
+        start = ingest(store, random.Random(args.seed), args.alerts, args.hours)
+        end = start + args.hours * HOUR
+        conn = store._connection()
+        rows = conn.execute("SELECT span, COUNT(*) FROM alert_rollups GROUP BY span").fetchall()
+        print(f"{args.alerts:,} alertas; filas de rollup por span: "
+              + ", ".join(f"{span // 1_000_000}s={count:,}" for span, count in rows))
+        cases = (
+            ("por minuto, últimas 24 h", 60 * 1_000_000, end - 24 * HOUR + 1234567),
+            ("por hora, todo el histórico", HOUR, start + 7654321),
+            ("por 5 min, 24 h, sid=1000042", 300 * 1_000_000, end - 24 * HOUR),
+        )
+        for name, interval, since in cases:
+            sid = 1000042 if "sid" in name else None
+            rollup, counts = timed(lambda: store.histogram(interval, since, end, sid=sid))
+            low, high = store._id_bounds(since, end)
+            sql = "SELECT ts / ?, COUNT(*) FROM alerts WHERE id BETWEEN ? AND ?"
+            sql += " AND sid = ? GROUP BY 1" if sid else " GROUP BY 1"
+            params = (interval, low, high) + ((sid,) if sid else ())
+            scan, _ = timed(lambda: conn.execute(sql, params).fetchall(), 1)
+            print(f"{name:>30}: rollups {rollup * 1000:7.1f} ms, GROUP BY sobre alertas "
+                  f"{scan * 1000:8.1f} ms ({len(counts)} intervalos, {sum(counts.values()):,} alertas)")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Benchmark de latencia de consultas de personas durante lecturas lentas de alertas.
+
+Reproduce en un bucle asyncio lo que hacen los endpoints: ``--clients``
+clientes piden ``GET /api/persons/{email}`` cada ``--interval`` ms mientras
+``--readers`` clientes repiten una consulta de ``/api/alerts`` que recorre
+todo el histórico (filtro por descripción sobre ``--alerts`` alertas).
+Compara leer dentro del bucle, como antes, con ``run_in_executor`` sobre un
+pool acotado como ``io_executor``. La latencia de una consulta es el
+retraso desde que debía atenderse hasta que tiene la respuesta.
+
+    python -m benchmarks.bench_io_offload --alerts 300000 --seconds 5
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from alert_cache import EncodedAlertCache  # noqa: E402
+from alert_store import AlertStore  # noqa: E402
+from benchmarks.bench_people import Person, make_people  # noqa: E402
+from benchmarks.bench_stats import ingest  # noqa: E402
+from people_store import PeopleStore, normalize_email  # noqa: E402
+
+
+def slow_read(store, cache):
+    alerts = store.query(limit=3000, description="no-existe")
+    return alerts, cache.encode_list(alerts)
+
+
+async def scenario(store, cache, people, emails, args, executor):
+    deadline = time.perf_counter() + args.seconds
+    latencies = []
+    reads = 0
+
+    async def reader():
+        nonlocal reads
+        while time.perf_counter() < deadline:
+            if executor is None:
+                slow_read(store, cache)
+            else:
+                await asyncio.get_running_loop().run_in_executor(executor, slow_read, store, cache)
+            reads += 1
+            await asyncio.sleep(0)
+
+    async def client(rng):
+        due = time.perf_counter() + rng.random() * args.interval / 1000
+        while due < deadline:
+            await asyncio.sleep(max(0, due - time.perf_counter()))
+            people.get(rng.choice(emails))
+            latencies.append(time.perf_counter() - due)
+            due += args.interval / 1000
+
+    rng = random.Random(args.seed)
+    await asyncio.gather(*(reader() for _ in range(args.readers)),
+                         *(client(random.Random(rng.random())) for _ in range(args.clients)))
+    latencies.sort()
+    return reads, [latencies[int(len(latencies) * q)] for q in (0.5, 0.99)] + [latencies[-1]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--alerts", type=int, default=300000)
+    parser.add_argument("--people", type=int, default=10000)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--readers", type=int, default=2)
+    parser.add_argument("--interval", type=float, default=10.0, help="ms entre consultas de cada cliente")
+    parser.add_argument("--workers", type=int, default=8, help="tamaño del pool de E/S")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = AlertStore(os.path.join(tmp, "alerts.db"))
+        ingest(store, random.Random(args.seed), args.alerts, 24)
+        cache = EncodedAlertCache(32 * 1024 * 1024)
+        people = PeopleStore(os.path.join(tmp, "people.json"), Person)
+        for person in make_people(args.people):
+            people._people[normalize_email(person.email)] = person
+        emails = [f"persona.{i}@example.com" for i in range(args.people)]
+
+        begin = time.perf_counter()
+        slow_read(store, cache)
+        print(f"lectura de alertas: {(time.perf_counter() - begin) * 1000:,.0f} ms")
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            for name, pool in (("en el bucle", None), (f"pool de {args.workers}", executor)):
+                reads, (p50, p99, worst) = asyncio.run(scenario(store, cache, people, emails, args, pool))
+                print(f"{name:>12}: {reads:4} lecturas de alertas; GET /api/persons/{{email}} "
+                      f"p50 {p50 * 1000:7.2f} ms, p99 {p99 * 1000:7.2f} ms, máx {worst * 1000:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Benchmark de serialización de la respuesta de /api/alerts.
+
+Compara el camino de FastAPI (validar cada alerta contra ``List[Alert]`` y
+codificar con ``json``) con ``json_encoding.dumps`` sobre los dicts que ya
+produce el parser, para 3k, 30k y 300k alertas.
+
+    python -m benchmarks.bench_json --counts 3000,30000,300000
+
+El camino original necesita ``pydantic`` instalado.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from alert_parser import parse_line  # noqa: E402
+from benchmarks.bench_parser import CORPUS, load_corpus  # noqa: E402
+from json_encoding import dumps, orjson  # noqa: E402
+
+try:
+    from pydantic import BaseModel
+except ImportError:
+    BaseModel = None
+
+
+def build_alerts(count):
+    alerts = []
+    for i, line in enumerate(load_corpus(CORPUS, count), 1):
+        alert = parse_line(line)
+        alert["id"] = i
+        alerts.append(alert)
+    return alerts
+
+
+def pydantic_path():
+    if BaseModel is None:
+        return None
+
+    # Mismos campos que app.Alert
+    class Alert(BaseModel):
+        id: Optional[int] = None
+        timestamp: str
+        ip_src: str
+        ip_dst: str
+        protocol: str
+        alert: str
+        description: str
+        gid: Optional[int] = None
+        sid: Optional[int] = None
+        rev: Optional[int] = None
+        classification: Optional[str] = None
+        priority: Optional[int] = None
+        src_port: Optional[int] = None
+        dst_port: Optional[int] = None
+
+    try:
+        from pydantic import TypeAdapter
+    except ImportError:
+        # pydantic 1.x
+        from pydantic import parse_obj_as
+
+        def encode(alerts):
+            models = parse_obj_as(List[Alert], alerts)
+            return json.dumps([model.dict() for model in models]).encode("utf-8")
+        return encode
+
+    adapter = TypeAdapter(List[Alert])
+
+    def encode(alerts):
+        models = adapter.validate_python(alerts)
+        return json.dumps(adapter.dump_python(models, mode="json")).encode("utf-8")
+    return encode
+
+
+def measure(func, alerts, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(alerts)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--counts", default="3000,30000,300000")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    original = pydantic_path()
+    if original is None:
+        print("pydantic no está instalado: solo se mide el camino nuevo")
+    print(f"codificador: {'orjson' if orjson is not None else 'json'}")
+    print(f"{'alertas':>8} {'pydantic+json (ms)':>20} {'dumps (ms)':>12}")
+    for count in map(int, args.counts.split(",")):
+        alerts = build_alerts(count)
+        fast = measure(dumps, alerts, args.repeat)
+        slow = f"{measure(original, alerts, args.repeat) * 1000:20.1f}" if original else f"{'-':>20}"
+        print(f"{count:>8} {slow} {fast * 1000:12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Micro-benchmark del parser de líneas fast de Snort.
+
+Compara ``alert_parser.parse_line`` con el parseo original de ``get_alerts``
+(varios ``split`` por línea) sobre un corpus de líneas reales.
+
+    python -m benchmarks.bench_parser --lines 200000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from alert_parser import parse_line  # noqa: E402
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fast_alerts_sample.txt")
+
+
+def legacy_parse(line):
+    try:
+        return {
+            "timestamp": line.split(" ")[0],
+            "ip_src": line.split(" ")[-4],
+            "ip_dst": line.split(" ")[-3],
+            "protocol": line.split(" ")[-2],
+            "alert": line.split(" ")[1],
+            "description": line.split("[**]")[1].split("[Classification:")[0].strip()
+        }
+    except Exception:
+        return None
+
+
+def load_corpus(path, total):
+    with open(path, encoding="utf-8") as file:
+        sample = [line.rstrip("\n") for line in file if line.strip()]
+    return (sample * (total // len(sample) + 1))[:total]
+
+
+def measure(func, lines):
+    start = time.perf_counter()
+    for line in lines:
+        func(line)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", default=CORPUS)
+    parser.add_argument("--lines", type=int, default=200000)
+    args = parser.parse_args()
+
+    lines = load_corpus(args.corpus, args.lines)
+    failed = sum(1 for line in lines if parse_line(line) is None)
+    print(f"{len(lines)} líneas, {failed} sin parsear")
+    for name, func in (("original", legacy_parse), ("parse_line", parse_line)):
+        elapsed = measure(func, lines)
+        print(f"{name:>12}: {len(lines) / elapsed:12,.0f} líneas/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Benchmark de registros por segundo con hash de contraseñas.
+
+``--clients`` clientes registran personas como ``POST /api/persons``
+(hash de scrypt y alta en ``PeopleStore`` esperando al disco) mientras
+otro cliente consulta ``GET /api/persons/{email}`` cada 10 ms. Compara
+calcular el hash dentro del bucle de eventos con ``PasswordHasher``.
+
+    python -m benchmarks.bench_password_hash --clients 1 8 32 --workers 4
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_people import Person  # noqa: E402
+from passwords import SCRYPT_N, SCRYPT_P, SCRYPT_R, PasswordHasher, hash_password  # noqa: E402
+from people_store import PeopleStore  # noqa: E402
+
+
+async def run(store, hash_async, clients, seconds):
+    ids = itertools.count()
+    deadline = time.perf_counter() + seconds
+    registered = 0
+    lookups = []
+
+    async def register():
+        nonlocal registered
+        while time.perf_counter() < deadline:
+            i = next(ids)
+            hashed = await hash_async("secreto")
+            await asyncio.wrap_future(store.add(Person("Nueva", f"nueva.{i}@example.com", hashed)))
+            registered += 1
+
+    async def lookup():
+        due = time.perf_counter()
+        while due < deadline:
+            await asyncio.sleep(max(0, due - time.perf_counter()))
+            store.get("nueva.0@example.com")
+            lookups.append(time.perf_counter() - due)
+            due += 0.01
+
+    start = time.perf_counter()
+    await asyncio.gather(lookup(), *(register() for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    lookups.sort()
+    return registered / elapsed, lookups[int(len(lookups) * 0.99)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--n", type=int, default=SCRYPT_N)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+
+    hasher = PasswordHasher(n=args.n, workers=args.workers)
+
+    async def inline(password):
+        return hash_password(password, args.n, SCRYPT_R, SCRYPT_P)
+
+    print(f"scrypt N = {args.n}, {os.cpu_count()} CPU")
+    with tempfile.TemporaryDirectory() as tmp:
+        for clients in args.clients:
+            for name, hash_async in (("en el bucle", inline), (f"pool de {args.workers}", hasher.hash)):
+                store = PeopleStore(os.path.join(tmp, f"{name}-{clients}.json"), Person)
+                rate, p99 = asyncio.run(run(store, hash_async, clients, args.seconds))
+                store.close()
+                print(f"{clients:>3} clientes, {name:>12}: {rate:8,.1f} registros/s, "
+                      f"p99 de GET /api/persons/{{email}} {p99 * 1000:8.1f} ms")
+    hasher.shutdown()
+
+
+if __name__ == "__main__":
+    main()
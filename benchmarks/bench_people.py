@@ -0,0 +1,103 @@
+"""Benchmark de alta, consulta y baja de personas.
+
+Compara ``PeopleStore`` (dict indexado por email normalizado) con la lista
+que se recorría antes en cada operación, con ``--people`` personas cargadas.
+
+    python -m benchmarks.bench_people --people 100000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from people_store import PeopleStore  # noqa: E402
+
+
+class Person:
+    """Sustituto mínimo del modelo Pydantic ``Person`` de la API."""
+
+    def __init__(self, name, email, password):
+        self.name = name
+        self.email = email
+        self.password = password
+
+    def dict(self):
+        return {"name": self.name, "email": self.email, "password": self.password}
+
+
+def make_people(count):
+    return [Person(f"Persona {i}", f"Persona.{i}@Example.com", "secreto") for i in range(count)]
+
+
+def legacy_ops(people, emails, new_people):
+    db = list(people)
+    start = time.perf_counter()
+    for email in emails:
+        next(person for person in db if person.email == email)
+    lookup = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for person in new_people:
+        for existing in db:
+            if existing.email == person.email:
+                break
+        db.append(person)
+    register = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for email in emails:
+        db = [person for person in db if person.email != email]
+    delete = time.perf_counter() - start
+    return lookup, register, delete
+
+
+def store_ops(people, emails, new_people, path):
+    store = PeopleStore(path, Person)
+    for person in people:
+        store.add(person)
+    start = time.perf_counter()
+    for email in emails:
+        store.get(email.upper())
+    lookup = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for person in new_people:
+        store.add(person)
+    register = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for email in emails:
+        store.delete(email)
+    delete = time.perf_counter() - start
+    store.close()
+    return lookup, register, delete
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--people", type=int, default=100000)
+    parser.add_argument("--ops", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    people = make_people(args.people)
+    emails = [person.email for person in rng.sample(people, args.ops)]
+    new_people = [Person("Nueva", f"nueva.{i}@example.com", "secreto") for i in range(args.ops)]
+    with tempfile.TemporaryDirectory() as tmp:
+        runs = (("lista", lambda: legacy_ops(people, emails, new_people)),
+                ("PeopleStore", lambda: store_ops(people, emails, new_people,
+                                                  os.path.join(tmp, "people.json"))))
+        for name, ops in runs:
+            timings = ops()
+            print(f"{name:>12} ({args.people:,} personas): "
+                  + ", ".join(f"{label} {elapsed / args.ops * 1e6:,.1f} µs/op"
+                              for label, elapsed in zip(("consulta", "alta", "baja"), timings)))
+
+
+if __name__ == "__main__":
+    main()
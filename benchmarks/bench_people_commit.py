@@ -0,0 +1,96 @@
+"""Benchmark de altas duraderas con clientes concurrentes.
+
+Cada cliente registra personas una tras otra y espera a que su alta esté
+en disco, como hace ``POST /api/persons``. Compara un ``fsync`` por alta
+con el commit agrupado de ``PeopleStore`` para 1, 8, 64 y 256 clientes.
+
+    python -m benchmarks.bench_people_commit --clients 1 8 64 256 --seconds 2
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_people import Person  # noqa: E402
+from people_store import PeopleStore  # noqa: E402
+
+
+class FsyncPerWrite:
+    """Diario que escribe y sincroniza cada alta por separado."""
+
+    def __init__(self, path):
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def write(self, person):
+        line = json.dumps({"op": "add", "person": person.dict()}) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+async def run_clients(clients, seconds, register):
+    ids = itertools.count()
+    latencies = []
+    deadline = time.perf_counter() + seconds
+
+    async def client():
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            await register(Person("Nueva", f"nueva.{next(ids)}@example.com", "secreto"))
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return len(latencies) / elapsed, latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99)]
+
+
+def measure(tmp, clients, seconds):
+    results = {}
+
+    naive = FsyncPerWrite(os.path.join(tmp, f"naive-{clients}.journal"))
+
+    async def naive_register(person):
+        await asyncio.get_running_loop().run_in_executor(None, naive.write, person)
+
+    results["fsync por alta"] = asyncio.run(run_clients(clients, seconds, naive_register))
+    naive.close()
+
+    store = PeopleStore(os.path.join(tmp, f"group-{clients}.json"), Person)
+
+    async def group_register(person):
+        await asyncio.wrap_future(store.add(person))
+
+    results["commit agrupado"] = asyncio.run(run_clients(clients, seconds, group_register))
+    store.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 8, 64, 256])
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for clients in args.clients:
+            for name, (rate, p50, p99) in measure(tmp, clients, args.seconds).items():
+                print(f"{clients:>4} clientes, {name:>15}: {rate:10,.0f} altas/s, "
+                      f"p50 {p50 * 1000:7.2f} ms, p99 {p99 * 1000:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Benchmark de registros por segundo según el número de personas.
+
+Compara reescribir ``people_db.json`` completo en cada alta (como hacía
+``save_people``) con el diario de ``PeopleStore``, partiendo de 1k, 10k y
+100k personas ya registradas.
+
+    python -m benchmarks.bench_people_write --sizes 1000 10000 100000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_people import Person, make_people  # noqa: E402
+from people_store import PeopleStore  # noqa: E402
+
+
+def rewrite_rate(path, people, registrations):
+    db = list(people)
+    start = time.perf_counter()
+    for i in range(registrations):
+        db.append(Person("Nueva", f"nueva.{i}@example.com", "secreto"))
+        with open(path, "w") as file:
+            json.dump([person.dict() for person in db], file, indent=4)
+    return registrations / (time.perf_counter() - start)
+
+
+def journal_rate(path, people, registrations):
+    store = PeopleStore(path, Person)
+    for person in people:
+        store._people[person.email.casefold()] = person
+    store.save()
+    start = time.perf_counter()
+    for i in range(registrations):
+        committed = store.add(Person("Nueva", f"nueva.{i}@example.com", "secreto"))
+    # Las altas se escriben por lotes: contar hasta que la última está en disco
+    committed.result()
+    rate = registrations / (time.perf_counter() - start)
+    store.close()
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--seconds", type=float, default=2.0,
+                        help="tiempo aproximado por medición de la reescritura completa")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            people = make_people(size)
+            # Estimar cuántas altas caben en el tiempo previsto reescribiendo todo
+            probe = rewrite_rate(os.path.join(tmp, "probe.json"), people, 3)
+            rewrite = rewrite_rate(os.path.join(tmp, "rewrite.json"), people,
+                                   max(3, int(probe * args.seconds)))
+            journal = journal_rate(os.path.join(tmp, f"journal-{size}.json"), people, 5000)
+            print(f"{size:>7,} personas: reescritura completa {rewrite:10,.0f} altas/s, "
+                  f"diario {journal:10,.0f} altas/s ({journal / rewrite:,.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
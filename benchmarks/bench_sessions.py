@@ -0,0 +1,72 @@
+"""Benchmark del coste de autorizar una petición.
+
+Compara, por petición autorizada entre ``--sessions`` sesiones activas:
+verificar la contraseña con scrypt (lo que costaría sin tokens), validar el
+token firmado sin caché (HMAC y consulta a ``PeopleStore``) y validarlo con
+la caché de ``SessionManager``.
+
+    python -m benchmarks.bench_sessions --sessions 10000 --requests 200000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_people import Person  # noqa: E402
+from passwords import hash_password, verify_password  # noqa: E402
+from people_store import PeopleStore, normalize_email  # noqa: E402
+from sessions import SessionManager  # noqa: E402
+
+
+def per_request(func, requests):
+    start = time.perf_counter()
+    for item in requests:
+        func(item)
+    return (time.perf_counter() - start) / len(requests)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=200000)
+    parser.add_argument("--hashes", type=int, default=20, help="peticiones medidas verificando con scrypt")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    # Un único hash real: todas las personas comparten contraseña
+    stored = hash_password("secreto")
+    with tempfile.TemporaryDirectory() as tmp:
+        people = PeopleStore(os.path.join(tmp, "people.json"), Person)
+        for i in range(args.sessions):
+            person = Person(f"Persona {i}", f"persona.{i}@example.com", stored)
+            people._people[normalize_email(person.email)] = person
+
+        def lookup(email):
+            person = people.get(email)
+            return person.password if person is not None else None
+
+        secret = os.urandom(32)
+        cached = SessionManager(lookup, secret=secret)
+        uncached = SessionManager(lookup, secret=secret, cache_size=0)
+        tokens = [cached.issue(f"persona.{i}@example.com", stored) for i in range(args.sessions)]
+        requests = [rng.choice(tokens) for _ in range(args.requests)]
+        for token in tokens:
+            cached.validate(token)
+
+        results = [
+            ("scrypt por petición", per_request(lambda _: verify_password("secreto", stored),
+                                                requests[:args.hashes])),
+            ("token sin caché", per_request(uncached.validate, requests)),
+            ("token en caché", per_request(cached.validate, requests)),
+        ]
+    for name, seconds in results:
+        print(f"{name:>20}: {seconds * 1e6:12,.1f} µs/petición, {1 / seconds:12,.0f} peticiones/s por núcleo")
+
+
+if __name__ == "__main__":
+    main()
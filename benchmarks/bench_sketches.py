@@ -0,0 +1,72 @@
+"""Benchmark de los sketches de alta cardinalidad.
+
+Ingiere ``--alerts`` alertas (la mitad con IP de origen aleatoria, como un
+escaneo) y compara, por firma y en total, las IPs de origen distintas y el
+top 10 de los sketches con los valores exactos calculados en SQLite.
+También mide el coste de la ingesta y el tamaño de los sketches guardados.
+
+    python -m benchmarks.bench_sketches --alerts 1000000 --hours 168
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import alert_store  # noqa: E402
+from alert_store import AlertStore  # noqa: E402
+from benchmarks.bench_stats import ingest, timed  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--alerts", type=int, default=1000000)
+    parser.add_argument("--hours", type=int, default=168)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = AlertStore(os.path.join(tmp, "alerts.db"))
+        begin = time.perf_counter()
+        ingest(store, random.Random(args.seed), args.alerts, args.hours)
+        elapsed = time.perf_counter() - begin
+        conn = store._connection()
+        size, rows = conn.execute("SELECT SUM(length(data)), COUNT(*) FROM alert_sketches").fetchone()
+        print(f"Ingesta: {args.alerts / elapsed:,.0f} alertas/s; {rows:,} sketches, {size / 1e6:.1f} MB")
+
+        # Misma ingesta sin sketches para ver su coste
+        update = AlertStore._update_sketches
+        AlertStore._update_sketches = lambda self, conn, entries: []
+        try:
+            plain = AlertStore(os.path.join(tmp, "plain.db"))
+            begin = time.perf_counter()
+            ingest(plain, random.Random(args.seed), args.alerts, args.hours)
+            print(f"Sin sketches: {args.alerts / (time.perf_counter() - begin):,.0f} alertas/s")
+            plain._connection().close()
+        finally:
+            AlertStore._update_sketches = update
+
+        sids = [sid for sid, in conn.execute(
+            "SELECT sid FROM alerts GROUP BY sid ORDER BY COUNT(*) DESC LIMIT 5")]
+        for sid in [None] + sids:
+            approx, stats = timed(lambda: store.sketch_stats("ip_src", sid=sid))
+            where, params = ("WHERE sid = ?", (sid,)) if sid is not None else ("", ())
+            exact, distinct = timed(lambda: conn.execute(
+                f"SELECT COUNT(DISTINCT ip_src) FROM alerts {where}", params).fetchone()[0], 1)
+            top = conn.execute(f"SELECT ip_src, COUNT(*) AS n FROM alerts {where} "
+                               f"GROUP BY 1 ORDER BY n DESC LIMIT 10", params).fetchall()
+            found = {key for key, _, _ in stats["top"]}
+            error = abs(stats["distinct"] - distinct) / distinct
+            print(f"sid={sid or 'todas':>8}: distintas {stats['distinct']:>9,} (real {distinct:,}, "
+                  f"error {error:.2%}, esperado ±{stats['distinct_error']:.1%}); "
+                  f"top 10 real encontrado {sum(key in found for key, _ in top)}/10; "
+                  f"sketches {approx * 1000:.1f} ms, exacto {exact * 1000:.1f} ms")
+        print(f"Memoria por sketch: HyperLogLog {1 << 11:,} bytes, Space-Saving {alert_store.HEAVY_HITTERS} claves")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Benchmark de /api/alerts/stats.
+
+Ingiere ``--alerts`` alertas repartidas en ``--hours`` horas con
+``AlertStore.add`` (que mantiene los contadores por hora) y compara el
+top 10 por cada campo con contadores frente a un ``GROUP BY`` sobre todas
+las alertas.
+
+    python -m benchmarks.bench_stats --alerts 1000000 --hours 720
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from alert_parser import format_timestamp  # noqa: E402
+from alert_store import STATS_DIMENSIONS, AlertStore  # noqa: E402
+
+PROTOCOLS = ("TCP", "UDP", "ICMP")
+CLASSIFICATIONS = (None, "Misc activity", "Attempted Information Leak", "Potentially Bad Traffic")
+
+
+def ingest(store, rng, total, hours, batch_size=5000):
+    start = int(time.time() * 1_000_000) - hours * 3600 * 1_000_000
+    step = hours * 3600 * 1_000_000 // total
+    batch = []
+    for i in range(1, total + 1):
+        batch.append({
+            "id": i,
+            "timestamp": format_timestamp(start + i * step),
+            # Pocos orígenes muy ruidosos y una cola larga de IPs aleatorias
+            "ip_src": f"10.0.0.{rng.randint(1, 20)}" if rng.random() < 0.5
+            else f"{rng.randint(1, 223)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}",
+            "ip_dst": f"192.168.{rng.randint(0, 3)}.{rng.randint(1, 254)}",
+            "protocol": rng.choice(PROTOCOLS),
+            "alert": "1:1:1",
+            "description": "bench",
+            "gid": 1,
+            "sid": rng.randint(1000000, 1000500),
+            "rev": 1,
+            "classification": rng.choice(CLASSIFICATIONS),
+            "priority": rng.randint(1, 3),
+            "src_port": None,
+            "dst_port": None,
+        })
+        if len(batch) == batch_size:
+            store.add(batch, 0, i)
+            batch = []
+    if batch:
+        store.add(batch, 0, total)
+    return start
+
+
+def timed(func, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - begin)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--alerts", type=int, default=1000000)
+    parser.add_argument("--hours", type=int, default=720)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = AlertStore(os.path.join(tmp, "alerts.db"))
+        begin = time.perf_counter()
+        start = ingest(store, random.Random(args.seed), args.alerts, args.hours)
+        elapsed = time.perf_counter() - begin
+        print(f"Ingesta: {args.alerts / elapsed:,.0f} alertas/s con contadores")
+        conn = store._connection()
+        # Ventana de las últimas 24 h sin alinear a la hora
+        since = start + (args.hours - 24) * 3600 * 1_000_000 + 1234567
+        for dim in STATS_DIMENSIONS:
+            counters, (total, keys, _) = timed(lambda: store.stats(dim))
+            window, _ = timed(lambda: store.stats(dim, since=since))
+            scan, _ = timed(lambda: conn.execute(
+                f"SELECT {dim}, COUNT(*) AS n FROM alerts GROUP BY 1 ORDER BY n DESC LIMIT 10").fetchall(), 1)
+            print(f"{dim:>15} ({keys:,} claves): contadores {counters * 1000:8.1f} ms, "
+                  f"últimas 24 h {window * 1000:7.1f} ms, GROUP BY completo {scan * 1000:8.1f} ms")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Benchmark de lectura de las últimas N líneas de alert.ids.
+
+Compara ``read_last_lines`` (lectura hacia atrás por bloques) con el
+``readlines()[-N:]`` original para archivos de distintos tamaños.
+
+    python -m benchmarks.bench_tail --sizes 10M,100M,1G,10G --limit 3000
+
+Los archivos se generan en un directorio temporal; 10G necesita ese espacio
+libre en disco. El método original solo se mide hasta ``--baseline-max``.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from alert_tail import read_last_lines  # noqa: E402
+
+LINE = (
+    "04/16-21:33:29.123456  [**] [1:1000001:1] ICMP test [**] "
+    "[Classification: Misc activity] [Priority: 3] {ICMP} 192.168.1.5 -> 192.168.1.1\n"
+)
+UNITS = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+
+
+def parse_size(text):
+    text = text.strip().upper()
+    if text[-1] in UNITS:
+        return int(float(text[:-1]) * UNITS[text[-1]])
+    return int(text)
+
+
+def build_file(path, size):
+    block = (LINE * ((1 << 20) // len(LINE))).encode()
+    with open(path, "wb") as file:
+        written = 0
+        while written < size:
+            file.write(block)
+            written += len(block)
+
+
+def readlines_baseline(path, n):
+    with open(path, "r", encoding="utf-8", errors="ignore") as file:
+        lines = file.readlines()
+    return lines[-n:]
+
+
+def measure(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10M,100M,1G,10G")
+    parser.add_argument("--limit", type=int, default=3000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--baseline-max", default="1G")
+    args = parser.parse_args()
+
+    baseline_max = parse_size(args.baseline_max)
+    print(f"{'tamaño':>10} {'inverso (ms)':>14} {'readlines (ms)':>16}")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "alert.ids")
+        for text in args.sizes.split(","):
+            size = parse_size(text)
+            build_file(path, size)
+            lines = read_last_lines(path, args.limit)
+            assert len(lines) == args.limit, len(lines)
+            reverse = measure(lambda: read_last_lines(path, args.limit), args.repeat)
+            if size <= baseline_max:
+                baseline = measure(lambda: readlines_baseline(path, args.limit), 1)
+                baseline_text = f"{baseline * 1000:16.2f}"
+            else:
+                baseline_text = f"{'-':>16}"
+            print(f"{text:>10} {reverse * 1000:14.2f} {baseline_text}")
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import bisect
+import ipaddress
+import socket
+
+# Las IPv4 se guardan como IPv6 mapeadas (::ffff:a.b.c.d) para que todas las
+# direcciones compartan un mismo espacio de claves de 16 bytes ordenable.
+_V4_PREFIX = b"\x00" * 10 + b"\xff\xff"
+_V4_BASE = int.from_bytes(_V4_PREFIX + b"\x00" * 4, "big")
+
+
+def ip_key(text):
+    """Clave binaria de 16 bytes de una IP, o ``None`` si no es una IP válida."""
+    try:
+        return _V4_PREFIX + socket.inet_pton(socket.AF_INET, text)
+    except (OSError, TypeError):
+        pass
+    try:
+        return socket.inet_pton(socket.AF_INET6, text.split("%", 1)[0])
+    except (OSError, TypeError, AttributeError):
+        return None
+
+
+def key_to_int(key):
+    return int.from_bytes(key, "big")
+
+
+def int_to_key(value):
+    return value.to_bytes(16, "big")
+
+
+def network_range(cidr):
+    """Devuelve el rango ``(primera, última)`` de claves enteras de un CIDR.
+
+    Lanza ``ValueError`` si el texto no es una red válida.
+    """
+    network = ipaddress.ip_network(cidr.strip(), strict=False)
+    low, high = int(network.network_address), int(network.broadcast_address)
+    if network.version == 4:
+        low, high = low + _V4_BASE, high + _V4_BASE
+    return low, high
+
+
+class NetworkSet:
+    """Conjunto de redes IPv4/IPv6 para comprobar pertenencia en O(log n).
+
+    Las redes se convierten en intervalos de claves enteras, se fusionan los
+    que se solapan y se guardan ordenados; una búsqueda es un ``bisect``
+    sobre los inicios de intervalo, sea cual sea el número de redes.
+    """
+
+    def __init__(self, cidrs):
+        intervals = sorted(network_range(cidr) for cidr in cidrs)
+        merged = []
+        for low, high in intervals:
+            if merged and low <= merged[-1][1] + 1:
+                if high > merged[-1][1]:
+                    merged[-1][1] = high
+            else:
+                merged.append([low, high])
+        self._starts = [low for low, _ in merged]
+        self._ends = [high for _, high in merged]
+
+    def __len__(self):
+        return len(self._starts)
+
+    def ranges(self):
+        """Intervalos fusionados como pares de claves binarias."""
+        return [(int_to_key(low), int_to_key(high)) for low, high in zip(self._starts, self._ends)]
+
+    def contains_key(self, key):
+        if key is None:
+            return False
+        value = key_to_int(key)
+        i = bisect.bisect_right(self._starts, value) - 1
+        return i >= 0 and value <= self._ends[i]
+
+    def __contains__(self, ip):
+        return self.contains_key(ip_key(ip))
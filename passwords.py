@@ -0,0 +1,143 @@
+import argparse
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Coste por defecto (N, r, p) y longitudes de sal y hash en bytes
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+SALT_BYTES = 16
+HASH_BYTES = 32
+# Hilos que calculan hashes: hashlib.scrypt suelta el GIL mientras trabaja
+HASH_WORKERS = 4
+
+PREFIX = "scrypt"
+
+
+def _b64encode(data):
+    return base64.b64encode(data).decode("ascii").rstrip("=")
+
+
+def _b64decode(text):
+    return base64.b64decode(text + "=" * (-len(text) % 4))
+
+
+def _scrypt(password, salt, n, r, p):
+    # Memoria que necesita scrypt (128 * r * (N + p + 2) bytes) más margen
+    maxmem = 128 * r * (n + p + 2) + 1024 * 1024
+    return hashlib.scrypt(password.encode("utf-8"), salt=salt, n=n, r=r, p=p, maxmem=maxmem,
+                          dklen=HASH_BYTES)
+
+
+def hash_password(password, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P):
+    """Devuelve ``scrypt$N$r$p$sal$hash`` con una sal aleatoria."""
+    salt = os.urandom(SALT_BYTES)
+    digest = _scrypt(password, salt, n, r, p)
+    return f"{PREFIX}${n}${r}${p}${_b64encode(salt)}${_b64encode(digest)}"
+
+
+def is_hashed(stored):
+    return stored.startswith(PREFIX + "$")
+
+
+def verify_password(password, stored):
+    """Comprueba ``password`` contra un valor de ``hash_password``.
+
+    Las contraseñas guardadas en claro antes de usar hashes también se
+    aceptan; ``needs_rehash`` las señala para sustituirlas.
+    """
+    if not is_hashed(stored):
+        return hmac.compare_digest(password.encode("utf-8"), stored.encode("utf-8"))
+    try:
+        _, n, r, p, salt, digest = stored.split("$")
+        expected = _b64decode(digest)
+        actual = _scrypt(password, _b64decode(salt), int(n), int(r), int(p))
+    except ValueError:
+        return False
+    return hmac.compare_digest(actual, expected)
+
+
+def needs_rehash(stored, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P):
+    """``True`` si ``stored`` está en claro o usa un coste distinto del actual."""
+    if not is_hashed(stored):
+        return True
+    return stored.split("$")[1:4] != [str(n), str(r), str(p)]
+
+
+class PasswordHasher:
+    """Calcula y verifica hashes en un pool de ``workers`` hilos.
+
+    Un hash de scrypt cuesta decenas de milisegundos de CPU a propósito; en
+    el bucle de eventos bloquearía todas las peticiones mientras dura.
+    """
+
+    def __init__(self, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P, workers=HASH_WORKERS):
+        self.n, self.r, self.p = n, r, p
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password")
+
+    async def hash(self, password):
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, hash_password, password, self.n, self.r, self.p)
+
+    async def verify(self, password, stored):
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, verify_password, password, stored)
+
+    def needs_rehash(self, stored):
+        return needs_rehash(stored, self.n, self.r, self.p)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+
+def calibrate(target, r=SCRYPT_R, p=SCRYPT_P, max_n=2 ** 20):
+    """Mide scrypt con N creciente y devuelve ``(n, segundos)`` del mayor N
+    cuyo hash tarda como mucho ``target`` segundos, junto con las mediciones.
+    """
+    measurements = []
+    chosen = None
+    n = 2 ** 10
+    while n <= max_n:
+        elapsed = min(_timed_hash(n, r, p) for _ in range(3))
+        measurements.append((n, elapsed))
+        if elapsed > target:
+            break
+        chosen = (n, elapsed)
+        n *= 2
+    return chosen, measurements
+
+
+def _timed_hash(n, r, p):
+    start = time.perf_counter()
+    hash_password("calibracion", n, r, p)
+    return time.perf_counter() - start
+
+
+# Calibrar el coste para este equipo: python -m passwords --target-ms 100
+def main():
+    parser = argparse.ArgumentParser(description="Elige el coste de scrypt para una latencia objetivo.")
+    parser.add_argument("--target-ms", type=float, default=100.0)
+    parser.add_argument("--r", type=int, default=SCRYPT_R)
+    parser.add_argument("--p", type=int, default=SCRYPT_P)
+    args = parser.parse_args()
+
+    chosen, measurements = calibrate(args.target_ms / 1000, args.r, args.p)
+    for n, elapsed in measurements:
+        print(f"N = 2**{n.bit_length() - 1:<2}  {elapsed * 1000:8.1f} ms  "
+              f"{128 * args.r * n / 1024 / 1024:6.0f} MiB")
+    if chosen is None:
+        print(f"Ni N = 2**10 baja de {args.target_ms:g} ms: reduce r o p")
+        return
+    n, elapsed = chosen
+    print(f"\nSCRYPT_N = 2 ** {n.bit_length() - 1}  # {elapsed * 1000:.1f} ms por hash")
+    print(f"SCRYPT_R = {args.r}")
+    print(f"SCRYPT_P = {args.p}")
+
+
+if __name__ == "__main__":
+    main()
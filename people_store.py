@@ -0,0 +1,296 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+# Registros mínimos en el diario antes de compactarlo en una instantánea
+COMPACT_MIN = 1000
+# Segundos que espera el hilo de escritura para juntar más cambios en un
+# commit; con 0 se agrupan los que llegan mientras dura el fsync anterior
+COMMIT_WINDOW = 0
+
+
+def normalize_email(email):
+    return email.strip().casefold()
+
+
+class PeopleStore:
+    """Personas registradas, indexadas por email normalizado.
+
+    Un dict conserva el orden de registro y a la vez es el índice hash por
+    email (sin distinguir mayúsculas), así que alta, consulta, comprobación
+    de duplicados y baja son O(1) sin recorrer la lista. ``model`` construye
+    cada persona a partir de un dict y debe tener ``.email`` y ``.dict()``.
+
+    Los cambios no reescriben ``path``: cada alta o baja añade una línea
+    JSON a un diario (``path + ".journal"``). Cuando el diario tiene más
+    registros que personas (y al menos ``compact_min``) se compacta: se
+    escribe una instantánea completa en ``path`` y se vacía el diario, de
+    modo que el coste por cambio es O(1) amortizado. Al cargar se lee la
+    instantánea y se aplica el diario encima.
+
+    Las escrituras se agrupan: ``add`` y ``delete`` aplican el cambio en
+    memoria, lo encolan y devuelven un ``Future``. Un hilo escribe todo lo
+    encolado durante ``commit_window`` segundos con un solo ``write`` y un
+    ``fsync``, y completa los ``Future`` cuando los cambios están en disco.
+    Si la escritura falla se deshacen en memoria los cambios que aún no
+    están en disco y sus ``Future`` terminan con la excepción.
+    """
+
+    def __init__(self, path, model, compact_min=COMPACT_MIN, commit_window=COMMIT_WINDOW):
+        self.path = path
+        self.journal_path = path + ".journal"
+        self.model = model
+        self.compact_min = compact_min
+        self.commit_window = commit_window
+        # Se incrementa con cada cambio (para los ETag). version vuelve a
+        # empezar en cada proceso: epoch distingue un 2 de antes de reiniciar
+        # de un 2 de después
+        self.version = 0
+        self.epoch = os.urandom(8).hex()
+        self._people = {}
+        self._journal = None
+        self._journal_records = 0
+        self._lock = threading.Lock()
+        # Cambios pendientes de escribir: (línea del diario, Future, email
+        # normalizado, persona que había antes o None)
+        self._pending = []
+        self._wakeup = threading.Condition(self._lock)
+        # Solo un escritor a la vez en el diario y la instantánea
+        self._io_lock = threading.Lock()
+        self._writer = None
+        self._closing = False
+
+    def __len__(self):
+        return len(self._people)
+
+    def __iter__(self):
+        return iter(self.all())
+
+    def all(self):
+        with self._lock:
+            return list(self._people.values())
+
+    def load(self):
+        people = {}
+        if os.path.exists(self.path):
+            with open(self.path, "r") as file:
+                for item in json.load(file):
+                    person = self.model(**item)
+                    people[normalize_email(person.email)] = person
+        records = 0
+        if os.path.exists(self.journal_path):
+            valid = 0
+            with open(self.journal_path, "rb") as file:
+                for line in file:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    valid += len(line)
+                    # Aplicar un registro dos veces da el mismo resultado, así
+                    # que un diario ya incluido en la instantánea no hace daño
+                    if record["op"] == "add":
+                        person = self.model(**record["person"])
+                        people[normalize_email(person.email)] = person
+                    else:
+                        people.pop(record["email"], None)
+                    records += 1
+            if valid < os.path.getsize(self.journal_path):
+                # Última línea a medio escribir si el proceso se cortó: se
+                # descarta para que los registros siguientes no se peguen a ella
+                os.truncate(self.journal_path, valid)
+        with self._lock:
+            self._people = people
+            self._journal_records = records
+            self.version += 1
+
+    def _enqueue(self, record, key, previous):
+        # Se llama con self._lock tomado
+        future = Future()
+        self._pending.append((json.dumps(record, ensure_ascii=False) + "\n", future, key, previous))
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._run, name="people-writer", daemon=True)
+            self._writer.start()
+        self._wakeup.notify()
+        return future
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._pending and not self._closing:
+                    self._wakeup.wait()
+                if not self._pending:
+                    return
+            if self.commit_window:
+                # Dar tiempo a que lleguen más cambios para el mismo fsync
+                time.sleep(self.commit_window)
+            try:
+                self.flush()
+            except Exception as e:
+                # Si el hilo muriera, los Future siguientes no se completarían nunca
+                print(f"Error en el hilo de escritura de personas: {e}")
+
+    def flush(self):
+        """Escribe y sincroniza con disco todos los cambios encolados."""
+        with self._io_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return
+            size = None
+            try:
+                if self._journal is None:
+                    self._journal = open(self.journal_path, "a", encoding="utf-8")
+                size = os.path.getsize(self.journal_path)
+                self._journal.write("".join(entry[0] for entry in batch))
+                self._journal.flush()
+                os.fsync(self._journal.fileno())
+            except Exception as e:
+                print(f"Error al guardar las personas: {e}")
+                self._rollback(batch, size, e)
+                return
+            for _, future, _, _ in batch:
+                future.set_result(None)
+            self._journal_records += len(batch)
+            if self._journal_records >= max(self.compact_min, len(self._people)):
+                try:
+                    self._compact()
+                except Exception as e:
+                    # Los cambios ya están en el diario: se sigue sin compactar
+                    # y se reintenta con el próximo lote
+                    print(f"Error al compactar las personas: {e}")
+
+    def _rollback(self, batch, size, error):
+        # Se llama con self._io_lock tomado. Los cambios encolados después del
+        # lote se aplicaron en memoria encima de los suyos: también se
+        # deshacen, en orden inverso, para que la memoria coincida con el disco
+        journal, self._journal = self._journal, None
+        try:
+            if journal is not None:
+                journal.close()
+            if size is not None:
+                # Quitar lo que llegara a escribirse del lote
+                os.truncate(self.journal_path, size)
+        except OSError:
+            pass
+        with self._lock:
+            failed = batch + self._pending
+            self._pending = []
+            for _, _, key, previous in reversed(failed):
+                if previous is None:
+                    self._people.pop(key, None)
+                else:
+                    self._people[key] = previous
+            self.version += 1
+        for _, future, _, _ in failed:
+            future.set_exception(error)
+
+    def _compact(self):
+        # Se llama con self._io_lock tomado. La instantánea solo lleva lo que
+        # ya está en el diario: los cambios encolados se deshacen en la copia
+        # (pueden fallar y deshacerse en memoria) y van al diario nuevo.
+        with self._lock:
+            people = dict(self._people)
+            for _, _, key, previous in reversed(self._pending):
+                if previous is None:
+                    people.pop(key, None)
+                else:
+                    people[key] = previous
+        # Instantánea en un archivo temporal que sustituye al anterior de una
+        # vez: si el proceso se corta, queda la instantánea vieja y el diario
+        temp = self.path + ".tmp"
+        with open(temp, "w") as file:
+            json.dump([person.dict() for person in people.values()], file, indent=4)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp, self.path)
+        _fsync_directory(os.path.dirname(os.path.abspath(self.path)))
+        if self._journal is not None:
+            journal, self._journal = self._journal, None
+            journal.close()
+        self._journal = open(self.journal_path, "w", encoding="utf-8")
+        self._journal_records = 0
+
+    def save(self):
+        """Escribe una instantánea completa y vacía el diario."""
+        with self._io_lock:
+            self._compact()
+
+    def close(self):
+        """Escribe lo pendiente y detiene el hilo de escritura."""
+        with self._lock:
+            self._closing = True
+            self._wakeup.notify()
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            writer.join()
+        self.flush()
+        with self._io_lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+        self._closing = False
+
+    def get(self, email):
+        return self._people.get(normalize_email(email))
+
+    def add(self, person):
+        """Registra ``person``.
+
+        Devuelve ``None`` si el email ya existe y si no un ``Future`` que se
+        completa cuando el alta está en disco.
+        """
+        key = normalize_email(person.email)
+        with self._lock:
+            if key in self._people:
+                return None
+            self._people[key] = person
+            self.version += 1
+            return self._enqueue({"op": "add", "person": person.dict()}, key, None)
+
+    def replace(self, person):
+        """Sustituye a la persona registrada con el email de ``person``.
+
+        Devuelve ``None`` si no existe y si no un ``Future`` como ``add``.
+        """
+        key = normalize_email(person.email)
+        with self._lock:
+            previous = self._people.get(key)
+            if previous is None:
+                return None
+            self._people[key] = person
+            self.version += 1
+            # Al cargar, un alta con un email ya registrado sustituye al anterior
+            return self._enqueue({"op": "add", "person": person.dict()}, key, previous)
+
+    def delete(self, email):
+        """Elimina la persona con ``email``.
+
+        Devuelve ``None`` si no existía y si no un ``Future`` que se completa
+        cuando la baja está en disco.
+        """
+        key = normalize_email(email)
+        with self._lock:
+            previous = self._people.pop(key, None)
+            if previous is None:
+                return None
+            self.version += 1
+            return self._enqueue({"op": "delete", "email": key}, key, previous)
+
+
+def _fsync_directory(path):
+    # Hace duradero el rename; en Windows no se puede abrir un directorio
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
@@ -0,0 +1,124 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Segundos de validez de un token y de una entrada de la caché
+TOKEN_TTL = 12 * 3600
+CACHE_TTL = 300
+# Tokens validados que se guardan como mucho en la caché
+CACHE_SIZE = 100000
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def credential_fingerprint(stored_password):
+    # Un cambio del hash guardado (nuevo registro con el mismo email, otra
+    # contraseña) invalida los tokens emitidos antes
+    return _b64encode(hashlib.blake2b(stored_password.encode("utf-8"), digest_size=8).digest())
+
+
+class SessionManager:
+    """Tokens firmados con HMAC y caché de tokens ya validados.
+
+    Un token es ``payload.firma`` con el email, la caducidad y una huella
+    del hash de la contraseña guardado. Validarlo por primera vez cuesta un
+    HMAC y una consulta a ``lookup(email)``, que devuelve el hash guardado o
+    ``None``; las siguientes veces es una búsqueda en un ``OrderedDict`` LRU
+    de como mucho ``cache_size`` entradas que caducan a los ``cache_ttl``
+    segundos (o antes, con el token). ``revoke`` saca de la caché todos los
+    tokens de un email.
+
+    Sin ``secret`` se genera uno aleatorio: los tokens dejan de valer al
+    reiniciar el proceso.
+    """
+
+    def __init__(self, lookup, secret=None, ttl=TOKEN_TTL, cache_ttl=CACHE_TTL, cache_size=CACHE_SIZE):
+        self.lookup = lookup
+        self.ttl = ttl
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self._secret = secret.encode("utf-8") if isinstance(secret, str) else secret or os.urandom(32)
+        # token -> (email normalizado, instante en que caduca la entrada)
+        self._cache = OrderedDict()
+        # email normalizado -> tokens en caché, para revocar sin recorrerla
+        self._by_email = {}
+        self._lock = threading.Lock()
+
+    def _sign(self, payload):
+        return _b64encode(hmac.new(self._secret, payload.encode("ascii"), hashlib.sha256).digest())
+
+    def issue(self, email, stored_password):
+        """Devuelve un token para ``email`` válido durante ``ttl`` segundos."""
+        expires = int(time.time()) + self.ttl
+        body = json.dumps([email, expires, credential_fingerprint(stored_password)], separators=(",", ":"))
+        payload = _b64encode(body.encode("utf-8"))
+        return f"{payload}.{self._sign(payload)}"
+
+    def validate(self, token):
+        """Devuelve el email del token o ``None`` si no es válido."""
+        now = time.time()
+        with self._lock:
+            entry = self._cache.get(token)
+            if entry is not None:
+                if entry[1] > now:
+                    self._cache.move_to_end(token)
+                    return entry[0]
+                self._forget(token)
+        email, expires = self._verify(token, now)
+        if email is None:
+            return None
+        with self._lock:
+            self._cache[token] = (email, min(expires, now + self.cache_ttl))
+            self._by_email.setdefault(email, set()).add(token)
+            while len(self._cache) > self.cache_size:
+                self._forget(next(iter(self._cache)))
+        return email
+
+    def _verify(self, token, now):
+        payload, _, signature = token.partition(".")
+        if not payload.isascii() or not hmac.compare_digest(signature.encode("utf-8"),
+                                                            self._sign(payload).encode("ascii")):
+            return None, None
+        try:
+            email, expires, fingerprint = json.loads(_b64decode(payload))
+        except ValueError:
+            return None, None
+        if expires <= now:
+            return None, None
+        stored = self.lookup(email)
+        if stored is None or not hmac.compare_digest(fingerprint, credential_fingerprint(stored)):
+            return None, None
+        return email, expires
+
+    def _forget(self, token):
+        # Se llama con self._lock tomado
+        email, _ = self._cache.pop(token)
+        tokens = self._by_email[email]
+        tokens.discard(token)
+        if not tokens:
+            del self._by_email[email]
+
+    def revoke(self, email):
+        """Invalida en la caché los tokens de ``email``.
+
+        Los tokens no cacheados ya fallan al validarse porque ``lookup``
+        deja de encontrar a la persona.
+        """
+        with self._lock:
+            for token in self._by_email.pop(email, ()):
+                del self._cache[token]
+
+    def stats(self):
+        with self._lock:
+            return {"tokens": len(self._cache), "emails": len(self._by_email)}
@@ -0,0 +1,148 @@
+import hashlib
+import heapq
+import json
+import math
+import zlib
+
+from json_encoding import dumps
+
+
+def _hash64(value):
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HyperLogLog:
+    """Contador aproximado de valores distintos con memoria fija.
+
+    Usa ``2**precision`` registros de un byte (2 KiB con la precisión por
+    defecto). El error estándar relativo es ``1.04 / sqrt(2**precision)``,
+    un 2,3 % con ``precision=11``: el 95 % de las estimaciones quedan a
+    menos del doble de ese error del valor real. Dos contadores con la misma
+    precisión se combinan con ``merge`` sin perder exactitud.
+    """
+
+    def __init__(self, precision=11, registers=None):
+        self.precision = precision
+        self.registers = bytearray(registers) if registers is not None else bytearray(1 << precision)
+
+    @property
+    def relative_error(self):
+        return 1.04 / math.sqrt(len(self.registers))
+
+    def update(self, values):
+        registers = self.registers
+        shift = 64 - self.precision
+        mask = (1 << shift) - 1
+        for value in values:
+            x = _hash64(value)
+            j = x >> shift
+            rank = shift - (x & mask).bit_length() + 1
+            if rank > registers[j]:
+                registers[j] = rank
+
+    def merge(self, *others):
+        # Un solo recorrido de los registros aunque se combinen muchos sketches
+        self.registers = bytearray(map(max, self.registers, *(other.registers for other in others)))
+
+    def count(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Corrección para cardinalidades pequeñas (conteo lineal)
+            estimate = m * math.log(m / zeros)
+        return round(estimate)
+
+    def to_bytes(self):
+        return bytes([self.precision]) + zlib.compress(bytes(self.registers), 1)
+
+    @classmethod
+    def from_bytes(cls, data):
+        return cls(data[0], zlib.decompress(data[1:]))
+
+
+class SpaceSaving:
+    """Heavy hitters (claves más frecuentes) con a lo sumo ``k`` contadores.
+
+    Cada contador guarda una cota ``error`` de lo que puede sobrestimar:
+    la frecuencia real está entre ``count - error`` y ``count``, y ``error``
+    nunca supera ``total / k``. Toda clave con frecuencia real mayor que
+    ``total / k`` está garantizada en el resultado. La memoria es fija por
+    muy ruidoso que sea un escaneo.
+    """
+
+    def __init__(self, k=64):
+        self.k = k
+        self.total = 0
+        self.counters = {}
+        # Montículo perezoso (count, clave) para encontrar el mínimo
+        self._heap = []
+
+    def update(self, counts):
+        """Suma un ``Counter`` (o dict clave -> frecuencia) de un lote."""
+        counters = self.counters
+        for key, count in counts.items():
+            self.total += count
+            entry = counters.get(key)
+            if entry is not None:
+                entry[0] += count
+            elif len(counters) < self.k:
+                counters[key] = [count, 0]
+                heapq.heappush(self._heap, (count, key))
+            else:
+                floor, victim = self._pop_min()
+                del counters[victim]
+                counters[key] = [floor + count, floor]
+                heapq.heappush(self._heap, (floor + count, key))
+
+    def _pop_min(self):
+        heap, counters = self._heap, self.counters
+        while True:
+            count, key = heapq.heappop(heap)
+            entry = counters.get(key)
+            if entry is None:
+                continue
+            if entry[0] == count:
+                return count, key
+            # Entrada desactualizada: se vuelve a poner con su cuenta actual
+            heapq.heappush(heap, (entry[0], key))
+
+    def floor(self):
+        """Cuenta mínima posible de una clave que no está en el resumen."""
+        if len(self.counters) < self.k:
+            return 0
+        return min(count for count, _ in self.counters.values())
+
+    def merge(self, other):
+        """Combina otro resumen; las cotas de error se suman."""
+        floor_a, floor_b = self.floor(), other.floor()
+        merged = {}
+        for key in self.counters.keys() | other.counters.keys():
+            count_a, error_a = self.counters.get(key, (floor_a, floor_a))
+            count_b, error_b = other.counters.get(key, (floor_b, floor_b))
+            merged[key] = [count_a + count_b, error_a + error_b]
+        top = sorted(merged.items(), key=lambda item: item[1][0], reverse=True)[:self.k]
+        self.total += other.total
+        self.counters = dict(top)
+        self._heap = [(entry[0], key) for key, entry in top]
+        heapq.heapify(self._heap)
+
+    def top(self, limit):
+        """``[(clave, cuenta, error)]`` de mayor a menor cuenta."""
+        items = sorted(self.counters.items(), key=lambda item: (-item[1][0], item[0]))[:limit]
+        return [(key, count, error) for key, (count, error) in items]
+
+    def to_bytes(self):
+        return dumps({"k": self.k, "total": self.total,
+                      "counters": [[key, count, error] for key, (count, error) in self.counters.items()]})
+
+    @classmethod
+    def from_bytes(cls, data):
+        state = json.loads(data)
+        sketch = cls(state["k"])
+        sketch.total = state["total"]
+        sketch.counters = {key: [count, error] for key, count, error in state["counters"]}
+        sketch._heap = [(entry[0], key) for key, entry in sketch.counters.items()]
+        heapq.heapify(sketch._heap)
+        return sketch
@@ -0,0 +1,19 @@
+import json
+
+from alert_cache import EncodedAlertCache
+
+
+def test_query_rows_do_not_evict_ingested_alerts():
+    cache = EncodedAlertCache(200)
+    recent = [{"id": i, "description": "reciente"} for i in (101, 102)]
+    cache.add(recent)
+    stored = cache.stats()["bytes"]
+
+    # Filas antiguas del histórico: se codifican, pero no entran en la caché
+    old = [{"id": i, "description": "antigua" * 5} for i in range(1, 50)]
+    assert json.loads(cache.encode_list(old)) == old
+    assert cache.stats()["entries"] == 2 and cache.stats()["bytes"] == stored
+    assert cache.stats()["evictions"] == 0
+
+    cache.encode_list(recent)
+    assert cache.stats()["hits"] == 2
@@ -0,0 +1,47 @@
+from alert_parser import format_timestamp, parse_line
+from alert_store import AlertStore
+from alert_tail import AlertTailer
+
+LINE = ("{ts}  [**] [1:{sid}:1] Regla {sid} [**] [Priority: 2] {{TCP}} {src}:{port} -> 10.0.0.22:22")
+START = 1_700_000_000_000_000
+
+
+def write_lines(path, lines):
+    with open(path, "a") as file:
+        for i, sid, src in lines:
+            file.write(LINE.format(ts=format_timestamp(START + i * 10_000), sid=sid, src=src, port=1024 + i)
+                       + "\n")
+
+
+def test_burst_counts_are_exact(tmp_path):
+    path = tmp_path / "alert.ids"
+    path.write_text("")
+    store = AlertStore(str(tmp_path / "alerts.db"))
+    published = []
+    tailer = AlertTailer(str(path), parse_line, maxlen=50, store=store, on_alerts=published.extend,
+                         coalesce_window=1.0)
+    tailer.poll()
+
+    # Una ráfaga de 7 líneas (mismo sid, origen y destino, 10 ms entre ellas)
+    # repartida en dos lecturas, con otra alerta en medio
+    write_lines(path, [(0, 2001219, "10.0.4.17"), (1, 2001219, "10.0.4.17"), (2, 1000001, "10.0.9.9"),
+                       (3, 2001219, "10.0.4.17")])
+    assert tailer.poll() == 4
+    assert [alert["count"] for alert in tailer.recent()] == [3, 1]
+    write_lines(path, [(i, 2001219, "10.0.4.17") for i in range(4, 8)])
+    assert tailer.poll() == 4
+
+    burst, other = store.after(0)
+    assert (burst["id"], burst["count"], other["count"]) == (1, 7, 1)
+    assert burst["first_seen"] == format_timestamp(START)
+    assert burst["last_seen"] == format_timestamp(START + 7 * 10_000)
+
+    # Contadores y rollups cuentan cada línea, no cada registro
+    total, _, top = store.stats("sid")
+    assert total == 8 and top == [(2001219, 7), (1000001, 1)]
+    epoch = store._epoch(format_timestamp(START))
+    assert sum(store.histogram(1_000_000, epoch - 1_000_000, epoch + 1_000_000).values()) == 8
+
+    # El anillo sustituye el registro en su sitio, con el mismo id
+    assert [(alert["id"], alert["count"]) for alert in tailer.recent()] == [(1, 7), (2, 1)]
+    assert published[-1]["id"] == 1 and published[-1]["count"] == 7
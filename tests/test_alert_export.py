@@ -0,0 +1,44 @@
+import io
+
+import pytest
+
+import alert_export
+from alert_export import columnar_chunks
+from alert_parser import parse_line
+from alert_store import AlertStore
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+LINE = ("04/16-21:33:{second:02d}.004512  [**] [1:2001219:20] {description} [**] "
+        "[Classification: Attempted Information Leak] [Priority: 2] {{TCP}} 10.0.4.{host}:51522 -> 10.0.0.22:22")
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = AlertStore(str(tmp_path / "alerts.db"))
+    alerts = [dict(parse_line(LINE.format(second=i % 60, description=f"Regla {i // 4}", host=i % 3)), id=i + 1)
+              for i in range(10)]
+    store.add(alerts, 1, 0)
+    # Lotes de 4 filas: cada record batch trae su propio diccionario
+    monkeypatch.setattr(alert_export, "COLUMNAR_BATCH_ROWS", 4)
+    return store
+
+
+def test_arrow_stream_with_a_dictionary_per_batch(store):
+    data = b"".join(columnar_chunks(store, "arrow"))
+    batches = list(pa.ipc.open_stream(data))
+    assert [batch.num_rows for batch in batches] == [4, 4, 2]
+    assert [batch.column("description").dictionary.to_pylist() for batch in batches] == [
+        ["Regla 0"], ["Regla 1"], ["Regla 2"]]
+    table = pa.Table.from_batches(batches)
+    assert table.column("id").to_pylist() == list(range(1, 11))
+    assert table.column("ip_src_v4").to_pylist()[:3] == [0x0A000400, 0x0A000401, 0x0A000402]
+
+
+def test_parquet_footer_and_filters(store):
+    data = b"".join(columnar_chunks(store, "parquet", ip_src="10.0.4.1"))
+    assert data[:4] == data[-4:] == b"PAR1"
+    table = pq.read_table(io.BytesIO(data))
+    assert table.column("id").to_pylist() == [2, 5, 8]
+    assert str(table.schema.field("ts").type) == "timestamp[us, tz=UTC]"
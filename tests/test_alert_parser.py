@@ -0,0 +1,24 @@
+from alert_parser import parse_buffer, parse_line
+
+LINES = [
+    # 29 de febrero sin año en la línea, prioridad por encima de 127
+    "02/29-21:33:29.123456 [**] [1:1000001:1] Ping [**] [Classification: Misc activity] "
+    "[Priority: 300] {ICMP} 192.168.1.5 -> 192.168.1.1",
+    # Año de snort -y y fracción corta
+    "04/16/26-21:33:29.12 [**] [1:2:1] IPv6 [**] [Priority: 2] {TCP} 2001:db8::1:443 -> [2001:db8::2]:80",
+    "04/16-21:33:30.004512 [**] [1:2001219:20] ET SCAN [x] Potential SSH Scan [**] "
+    "[Priority: 2] {TCP} 10.0.4.17:51522 -> 10.0.0.22:22",
+    # Espacios de más alrededor de descripción y clasificación
+    "04/16-21:33:31.000001  [**] [1:3:1] Ping  [**] [Classification:  Misc ] {TCP} 10.0.0.5:4431 -> 10.0.0.1:80",
+]
+
+
+def test_buffer_rows_match_parse_line():
+    expected = [parse_line(line) for line in LINES]
+    assert list(parse_buffer("\n".join(LINES) + "\n")) == expected
+    # El trozo sin espacios de más usa la expresión exacta: mismo resultado
+    assert list(parse_buffer("\n".join(LINES[:3]))) == expected[:3]
+    columns = parse_buffer("\n".join(LINES))
+    assert columns.row(1)["timestamp"] == "04/16/26-21:33:29.12"
+    assert columns.row(0)["priority"] == 300
+    assert columns.row(3)["description"] == "Ping" and columns.row(3)["classification"] == "Misc"
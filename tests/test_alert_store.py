@@ -0,0 +1,73 @@
+from alert_parser import parse_line
+from alert_store import AlertStore
+from alert_tail import AlertTailer
+
+LINE = ("04/16-21:33:30.004512  [**] [1:2001219:20] ET SCAN Potential SSH Scan [**] "
+        "[Classification: Attempted Information Leak] [Priority: 2] {TCP} 10.0.4.17:51522 -> 10.0.0.22:22")
+
+
+def test_poll_without_complete_lines_saves_offset(tmp_path):
+    path = tmp_path / "alert.ids"
+    path.write_text(LINE + "\n")
+    store = AlertStore(str(tmp_path / "alerts.db"))
+    tailer = AlertTailer(str(path), parse_line, store=store)
+    assert tailer.poll() == 1
+
+    # Línea en blanco y otra a medio escribir: ninguna alerta en el lote
+    with open(path, "a") as file:
+        file.write("\n" + LINE[:40])
+    assert tailer.poll() == 0
+    assert store.load_state() == (tailer.inode, len(LINE) + 2)
+
+    with open(path, "a") as file:
+        file.write(LINE[40:] + "\n")
+    assert tailer.poll() == 1
+    assert store.last_id() == 2
+    total, _, top = store.stats("sid")
+    assert total == 2 and top == [(2001219, 2)]
+
+
+def test_export_resumes_on_another_thread(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    from alert_export import ndjson_chunks
+
+    store = AlertStore(str(tmp_path / "alerts.db"))
+    alerts = [dict(parse_line(LINE), id=i) for i in range(1, 8)]
+    store.add(alerts, 1, 0)
+    # Lotes de 3 filas: cada next() en un hilo distinto, como en el threadpool
+    chunks = ndjson_chunks(store, batch_size=3)
+    lines = []
+    for _ in range(3):
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            lines += executor.submit(next, chunks).result().decode().splitlines()
+    assert next(chunks, None) is None
+    assert len(lines) == 7
+
+
+def test_histogram_after_second_rollups_expire(tmp_path, monkeypatch):
+    import alert_store
+    from alert_parser import format_timestamp
+
+    monkeypatch.setattr(alert_store, "ROLLUP_RETENTION", {1_000_000: 120 * 1_000_000})
+    monkeypatch.setattr(alert_store, "ROLLUP_PRUNE_EVERY", 30 * 1_000_000)
+    store = AlertStore(str(tmp_path / "alerts.db"))
+    start = 1_700_000_000_000_000
+    stamps = [start + i * 7_300_000 for i in range(100)]
+    tail = LINE.partition("  ")[2]
+    for batch in range(0, 100, 10):
+        alerts = [dict(parse_line(format_timestamp(ts) + "  " + tail), id=i + 1)
+                  for i, ts in enumerate(stamps[batch:batch + 10], batch)]
+        store.add(alerts, 1, batch)
+
+    # Solo quedan los buckets de un segundo de los últimos ~2 minutos
+    epochs = [store._epoch(format_timestamp(ts)) for ts in stamps]
+    oldest = store._connection().execute(
+        "SELECT MIN(bucket) FROM alert_rollups WHERE span = 1000000").fetchone()[0]
+    assert epochs[-1] - 160 * 1_000_000 < oldest * 1_000_000 < epochs[-1] - 60 * 1_000_000
+    for interval in (5_000_000, 60_000_000):
+        expected = {}
+        for ts in epochs:
+            slot = ts // interval * interval
+            expected[slot] = expected.get(slot, 0) + 1
+        assert store.histogram(interval, epochs[0] - 3_000_000, epochs[-1] + 3_000_000) == expected
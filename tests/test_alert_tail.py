@@ -0,0 +1,52 @@
+import alert_tail
+from alert_parser import format_timestamp, parse_line
+from alert_store import AlertStore
+from alert_tail import AlertTailer
+
+LINE = ("{ts}  [**] [1:2001219:20] ET SCAN Potential SSH Scan [**] "
+        "[Classification: Attempted Information Leak] [Priority: 2] {{TCP}} 10.0.4.17:{port} -> 10.0.0.22:22")
+
+
+def write_lines(path, count, start=1_700_000_000_000_000):
+    with open(path, "a") as file:
+        for i in range(count):
+            file.write(LINE.format(ts=format_timestamp(start + i * 1000), port=1024 + i) + "\n")
+
+
+def test_first_start_serves_the_tail_and_backfills_the_rest(tmp_path):
+    path = tmp_path / "alert.ids"
+    write_lines(path, 500)
+    store = AlertStore(str(tmp_path / "alerts.db"))
+    published = []
+    tailer = AlertTailer(str(path), parse_line, maxlen=50, store=store, on_alerts=published.extend)
+
+    tailer.poll()
+    # El anillo y los suscriptores reciben solo las últimas líneas
+    assert [alert["src_port"] for alert in tailer.recent()] == list(range(1474, 1524))
+    assert len(published) == 50
+    assert store.load_backfill() is not None
+
+    while tailer.backfill():
+        pass
+    assert len(published) == 50
+    assert store.load_backfill() is None
+    rows = store._connection().execute("SELECT src_port FROM alerts ORDER BY id").fetchall()
+    assert [row[0] for row in rows] == list(range(1024, 1524))
+    assert store.stats("sid")[0] == 500
+
+
+def test_backfill_resumes_after_restart(tmp_path, monkeypatch):
+    # Bloques de 4 KiB: el histórico se importa en varios pasos
+    monkeypatch.setattr(alert_tail, "READ_CHUNK", 4096)
+    path = tmp_path / "alert.ids"
+    write_lines(path, 300)
+    db = str(tmp_path / "alerts.db")
+    tailer = AlertTailer(str(path), parse_line, maxlen=10, store=AlertStore(db))
+    tailer.poll()
+    assert tailer.backfill()
+
+    tailer = AlertTailer(str(path), parse_line, maxlen=10, store=AlertStore(db))
+    tailer.poll()
+    while tailer.backfill():
+        pass
+    assert AlertStore(db).stats("sid")[0] == 300
@@ -0,0 +1,43 @@
+import asyncio
+
+from passwords import PasswordHasher, hash_password, is_hashed, needs_rehash, verify_password
+
+# Coste bajo para que los tests sean rápidos
+N = 2 ** 10
+
+
+def test_hash_and_verify():
+    stored = hash_password("secreto", n=N)
+    assert is_hashed(stored) and stored.split("$")[1:4] == [str(N), "8", "1"]
+    assert verify_password("secreto", stored)
+    assert not verify_password("otro", stored)
+    # Cada hash lleva su propia sal
+    assert hash_password("secreto", n=N) != stored
+    assert not verify_password("secreto", stored.rsplit("$", 1)[0] + "$roto!")
+
+
+def test_plaintext_is_accepted_and_flagged_for_rehash():
+    assert not is_hashed("123456")
+    assert verify_password("123456", "123456")
+    assert not verify_password("1234567", "123456")
+    assert needs_rehash("123456")
+
+    stored = hash_password("123456", n=N)
+    assert not needs_rehash(stored, n=N)
+    assert needs_rehash(stored, n=N * 2)
+    assert verify_password("123456", stored)
+
+
+def test_hasher_runs_in_its_pool():
+    hasher = PasswordHasher(n=N, workers=2)
+    try:
+        async def run():
+            stored = await hasher.hash("secreto")
+            return stored, await hasher.verify("secreto", stored), await hasher.verify("otro", stored)
+
+        stored, right, wrong = asyncio.run(run())
+        assert right and not wrong
+        assert not hasher.needs_rehash(stored)
+        assert hasher.needs_rehash("secreto")
+    finally:
+        hasher.shutdown()
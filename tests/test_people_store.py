@@ -0,0 +1,82 @@
+import json
+
+import pytest
+
+import people_store
+from people_store import PeopleStore
+
+
+class Person:
+    """Lo mínimo que PeopleStore necesita del modelo ``Person`` de la API."""
+
+    def __init__(self, name, email, password):
+        self.name = name
+        self.email = email
+        self.password = password
+
+    def dict(self):
+        return {"name": self.name, "email": self.email, "password": self.password}
+
+
+def test_failed_flush_rolls_back_memory(tmp_path, monkeypatch):
+    path = str(tmp_path / "people.json")
+    store = PeopleStore(path, Person)
+    store.add(Person("Ana", "ana@example.com", "x")).result()
+
+    def failing_fsync(fd):
+        raise OSError("disco lleno")
+
+    monkeypatch.setattr(people_store.os, "fsync", failing_fsync)
+    deleted = store.delete("ana@example.com")
+    added = store.add(Person("Bea", "bea@example.com", "x"))
+    for future in (deleted, added):
+        with pytest.raises(OSError):
+            future.result()
+    monkeypatch.undo()
+    assert store.get("ana@example.com").name == "Ana"
+    assert store.get("bea@example.com") is None
+
+    # Reintentar funciona y, tras reiniciar, el disco coincide con la memoria
+    store.add(Person("Bea", "bea@example.com", "x")).result()
+    store.close()
+    reloaded = PeopleStore(path, Person)
+    reloaded.load()
+    assert [person.email for person in reloaded] == ["ana@example.com", "bea@example.com"]
+
+
+def test_failed_compaction_keeps_the_writer_alive(tmp_path):
+    path = tmp_path / "people.json"
+    store = PeopleStore(str(path), Person, compact_min=1)
+    # Un directorio en lugar del temporal hace fallar cada instantánea
+    (tmp_path / "people.json.tmp").mkdir()
+    store.add(Person("Ana", "ana@example.com", "x")).result(timeout=5)
+    store.add(Person("Bea", "bea@example.com", "x")).result(timeout=5)
+    assert not path.exists()
+
+    # La compactación vuelve a intentarse con el siguiente lote (o con el
+    # anterior, si el hilo aún no había llegado a ella)
+    (tmp_path / "people.json.tmp").rmdir()
+    store.add(Person("Eva", "eva@example.com", "x")).result(timeout=5)
+    store.close()
+    assert path.exists()
+    reloaded = PeopleStore(str(path), Person)
+    reloaded.load()
+    assert [person.email for person in reloaded] == ["ana@example.com", "bea@example.com", "eva@example.com"]
+
+
+def test_snapshot_leaves_out_queued_changes(tmp_path):
+    path = tmp_path / "people.json"
+    store = PeopleStore(str(path), Person)
+    store.add(Person("Ana", "ana@example.com", "x")).result()
+    # Con el lock de E/S tomado el hilo de escritura no saca los cambios de la cola
+    with store._io_lock:
+        added = store.add(Person("Bea", "bea@example.com", "x"))
+        deleted = store.delete("ana@example.com")
+        store._compact()
+    assert [item["email"] for item in json.loads(path.read_text())] == ["ana@example.com"]
+    added.result()
+    deleted.result()
+    store.close()
+    reloaded = PeopleStore(str(path), Person)
+    reloaded.load()
+    assert [person.email for person in reloaded] == ["bea@example.com"]
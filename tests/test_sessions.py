@@ -0,0 +1,68 @@
+import sessions
+from sessions import SessionManager
+
+
+class Clock:
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def make_manager(monkeypatch, people, **kwargs):
+    clock = Clock()
+    monkeypatch.setattr(sessions.time, "time", clock)
+    return SessionManager(people.get, secret="secreto", **kwargs), clock
+
+
+def test_issue_and_validate(monkeypatch):
+    people = {"ana@example.com": "hash-1"}
+    manager, _ = make_manager(monkeypatch, people)
+    token = manager.issue("ana@example.com", "hash-1")
+    assert manager.validate(token) == "ana@example.com"
+    # Otra firma, otro secreto o un payload alterado no valen
+    payload, _, signature = token.partition(".")
+    assert manager.validate(payload + "." + signature[::-1]) is None
+    assert manager.validate("x" + token) is None
+    assert SessionManager(people.get, secret="otro").validate(token) is None
+
+
+def test_tokens_expire(monkeypatch):
+    people = {"ana@example.com": "hash-1"}
+    manager, clock = make_manager(monkeypatch, people, ttl=60, cache_ttl=300)
+    token = manager.issue("ana@example.com", "hash-1")
+    assert manager.validate(token) == "ana@example.com"
+    # La entrada en caché no dura más que el token
+    clock.now += 61
+    assert manager.validate(token) is None
+    assert manager.stats()["tokens"] == 0
+
+
+def test_reregistration_invalidates_tokens(monkeypatch):
+    people = {"ana@example.com": "hash-1"}
+    manager, clock = make_manager(monkeypatch, people, cache_ttl=30)
+    token = manager.issue("ana@example.com", "hash-1")
+    assert manager.validate(token) == "ana@example.com"
+    people["ana@example.com"] = "hash-2"
+    # Sin caché la huella ya no coincide; con caché, al caducar la entrada
+    assert SessionManager(people.get, secret="secreto", cache_size=0).validate(token) is None
+    clock.now += 31
+    assert manager.validate(token) is None
+    assert manager.validate(manager.issue("ana@example.com", "hash-2")) == "ana@example.com"
+
+
+def test_revoke_drops_cached_tokens(monkeypatch):
+    people = {"ana@example.com": "hash-1", "bea@example.com": "hash-2"}
+    manager, _ = make_manager(monkeypatch, people)
+    tokens = [manager.issue("ana@example.com", "hash-1") for _ in range(2)]
+    other = manager.issue("bea@example.com", "hash-2")
+    for token in tokens + [other]:
+        manager.validate(token)
+    del people["ana@example.com"]
+    # Sin revoke la caché seguiría aceptándolos
+    assert manager.validate(tokens[0]) == "ana@example.com"
+    manager.revoke("ana@example.com")
+    assert [manager.validate(token) for token in tokens] == [None, None]
+    assert manager.validate(other) == "bea@example.com"
+    assert manager.stats() == {"tokens": 1, "emails": 1}